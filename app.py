@@ -1,4 +1,5 @@
 import base64
+import logging
 import os
 
 import streamlit as st
@@ -11,6 +12,13 @@ from modules.measurements import (
 )
 from modules.ui.theme import apply_theme, get_colors
 
+# Logging is configured here, by the application; modules only create loggers
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()],
+)
+
 # Set page title and icon - must be the first Streamlit command
 st.set_page_config(
     page_title="Multiphoton Microscopy Guide",
@@ -5,13 +5,17 @@ USAF 1951 Resolution Target Analyzer
 A comprehensive tool for analyzing USAF 1951 resolution targets in microscopy and imaging systems.
 """
 
+import functools
 import hashlib
 import io
 import logging
 import os
 import re  # Add import for regex
-import tempfile
+import threading
 import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any
 
 import cv2
@@ -27,12 +31,9 @@ from skimage import exposure, img_as_ubyte
 from streamlit_image_coordinates import streamlit_image_coordinates
 
 # --- Logging Setup ---
+# Handlers and levels are left to the host application. Messages below WARNING
+# use lazy %-arguments so nothing is formatted unless they are emitted.
 logger = logging.getLogger(__name__)
-logging.basicConfig(
-    level=logging.WARNING,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler()],
-)
 
 # --- Constants ---
 # File Paths
@@ -65,6 +66,7 @@ SESSION_STATE_PREFIXES = [
     "image_path_",
     "image_name_",
     "roi_valid_",
+    "image_processor_",
 ]
 
 # UI Defaults
@@ -77,19 +79,317 @@ WELCOME_IMAGE_URL = (
 )
 WELCOME_IMAGE_CAPTION = "Example USAF 1951 Target"
 
+# Histogram equalization backends: OpenCV's global equalization, OpenCV's
+# tiled CLAHE, or scikit-image's float equalize_hist
+EQUALIZATION_METHODS = ("opencv", "clahe", "skimage")
+DEFAULT_EQUALIZATION_METHOD = "opencv"
+CLAHE_CLIP_LIMIT = 2.0
+CLAHE_TILE_GRID = (8, 8)
+
+# Keep float intermediates of normalization in float32 instead of the source's
+# float64, halving their memory at the cost of float32 rounding
+MEMORY_LEAN = os.environ.get("USAF_MEMORY_LEAN", "0") == "1"
+
+# Log value ranges of intermediate images at DEBUG level (costs full-image
+# reductions, so only done when enabled and the logger emits DEBUG)
+DEBUG_STATISTICS = os.environ.get("USAF_DEBUG_STATS", "0") == "1"
+
+# Widest image sent to the ROI selector; larger frames use a downsampled level
+DISPLAY_MAX_WIDTH = 1024
+
+# Decoded-image cache budget, shared by every session in this server process
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get("USAF_IMAGE_CACHE_MB", "512")) << 20
+
+# Optional on-disk image cache that survives server restarts (disabled if unset)
+IMAGE_DISK_CACHE_DIR = os.environ.get("USAF_DISK_CACHE_DIR")
+IMAGE_DISK_CACHE_MAX_BYTES = int(os.environ.get("USAF_DISK_CACHE_MB", "4096")) << 20
+# Kinds of cache entries written to disk; cheaper derived arrays stay in memory
+DISK_CACHED_KINDS = ("raw", "normalized", "display")
+# Bump when decoding or normalization output changes, to orphan stale entries
+DISK_CACHE_VERSION = 6
+# Bytes of the blake2b payload checksum appended to each disk cache file
+DISK_CACHE_DIGEST_SIZE = 16
+# Seconds after which a temporary file left by an interrupted write is removed
+DISK_CACHE_TEMP_MAX_AGE = 3600
+
+# --- Image Cache ---
+
+
+def _payload_digest(array: np.ndarray) -> bytes:
+    """blake2b checksum of an array's data in the order `np.save` writes it."""
+    if not array.flags.c_contiguous:
+        # np.save writes Fortran-ordered arrays as they are, others in C order
+        array = array.T if array.flags.f_contiguous else np.ascontiguousarray(array)
+    return hashlib.blake2b(array, digest_size=DISK_CACHE_DIGEST_SIZE).digest()
+
+
+class DiskImageCache:
+    """
+    Persistent cache of decoded and normalized images, one `.npy` file per entry.
+
+    Files are named after a hash of the cache key (content hash plus processing
+    parameters) and are loaded with `np.load(mmap_mode="r")`, so a warm start
+    neither decodes nor copies the image. Entries are written under a temporary
+    name and renamed into place, with a blake2b checksum of the array data
+    appended after it. On load, files whose header is unreadable, whose length
+    doesn't match the header, or whose data doesn't match the checksum are
+    deleted and treated as misses. The oldest entries by modification time
+    (refreshed on every hit) are evicted once the directory exceeds
+    `max_bytes`. Temporary files count towards the budget too, and those
+    orphaned by an interrupted write are removed once they are older than
+    `DISK_CACHE_TEMP_MAX_AGE`.
+
+    The checksum is only verified the first time a file is mapped in this
+    process. Hashing reads the whole file, which a memory-mapped load otherwise
+    avoids, and repeated loads are mostly served by the memory cache anyway.
+    The cost is that a file damaged after that first check goes unnoticed
+    until the server restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = IMAGE_DISK_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._verified: dict[str, int] = {}  # Path -> inode of checksummed files
+        os.makedirs(directory, exist_ok=True)
+        self._evict()
+
+    def _path(self, key: tuple) -> str:
+        digest = hashlib.blake2b(
+            repr((DISK_CACHE_VERSION, *key)).encode(), digest_size=20
+        ).hexdigest()
+        return os.path.join(self.directory, f"{digest}.npy")
+
+    def get(self, key: tuple) -> np.ndarray | None:
+        """Return the read-only mapped array stored under `key`, or None."""
+        path = self._path(key)
+        try:
+            value = np.load(path, mmap_mode="r", allow_pickle=False)
+            payload_end = value.offset + value.nbytes
+            stat = os.stat(path)
+            if stat.st_size != payload_end + DISK_CACHE_DIGEST_SIZE:
+                raise ValueError("file size does not match header")
+            if self._verified.get(path) != stat.st_ino:
+                with open(path, "rb") as f:
+                    f.seek(payload_end)
+                    if f.read() != _payload_digest(value):
+                        raise ValueError("payload checksum mismatch")
+                self._verified[path] = stat.st_ino
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding corrupt disk cache entry {path}: {e}")
+            self._remove(path)
+            return None
+        return value
+
+    def put(self, key: tuple, value: np.ndarray) -> None:
+        """Write `value` under `key`, then evict old entries to stay within budget."""
+        if value.dtype.hasobject or value.nbytes == 0 or value.nbytes > self.max_bytes:
+            return
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                np.save(f, value, allow_pickle=False)
+                f.write(_payload_digest(value))
+            os.replace(temp_path, path)
+            self._verified.pop(path, None)
+        except OSError as e:
+            logger.warning(f"Could not write disk cache entry {path}: {e}")
+            self._remove(temp_path)
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            total_bytes = 0
+            stale_before = time.time_ns() - DISK_CACHE_TEMP_MAX_AGE * 10**9
+            for entry in os.scandir(self.directory):
+                is_temp = entry.name.endswith(".tmp")
+                if not (is_temp or entry.name.endswith(".npy")):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if is_temp and stat.st_mtime_ns < stale_before:
+                    self._remove(entry.path)
+                    continue
+                total_bytes += stat.st_size
+                # In-progress writes are counted but never evicted
+                if not is_temp:
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            for _, size, path in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                self._remove(path)
+                total_bytes -= size
+
+    def _remove(self, path: str) -> None:
+        self._verified.pop(path, None)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove disk cache entry {path}: {e}")
+
+
+class DecodedImageCache:
+    """
+    Process-wide LRU cache for decoded and normalized images.
+
+    Keys start with the image's content hash (see `get_image_content_hash`), so
+    the same file uploaded twice, under any name or from any browser session,
+    is decoded once. Entries are evicted least-recently-used first whenever the
+    total size exceeds `max_bytes`. A value stored under several keys (e.g. a
+    grayscale image that is its own "grayscale" conversion) is counted once.
+    Cached arrays are made read-only because they are shared between sessions.
+
+    With a `disk` cache, decoded and normalized images (`DISK_CACHED_KINDS`)
+    are also written through to disk, and memory misses are looked up there.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = IMAGE_CACHE_MAX_BYTES,
+        disk: DiskImageCache | None = None,
+    ):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.disk = disk
+        self._entries: OrderedDict[tuple, Any] = OrderedDict()
+        # id of each cached value -> [number of keys holding it, its size]
+        self._sizes: dict[int, list[int]] = {}
+        self._lock = threading.Lock()
+
+    def _on_disk(self, key: tuple) -> bool:
+        return self.disk is not None and len(key) > 1 and key[1] in DISK_CACHED_KINDS
+
+    def get(self, key: tuple) -> Any:
+        """Return the cached value for `key` (marking it recently used), or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+        if not self._on_disk(key):
+            return None
+        value = self.disk.get(key)
+        if value is not None:
+            self._store(key, value, value.nbytes)
+        return value
+
+    def put(self, key: tuple, value: Any, nbytes: int | None = None) -> None:
+        """
+        Store `value` under `key`, evicting old entries to stay within budget.
+
+        Args:
+            key: Cache key, starting with the image content hash
+            value: Array (or small metadata value) to cache
+            nbytes: Size to account for; defaults to `value.nbytes` (0 if absent)
+        """
+        if nbytes is None:
+            nbytes = getattr(value, "nbytes", 0)
+        # Memory-mapped arrays are already backed by a file of their own
+        if (
+            self._on_disk(key)
+            and isinstance(value, np.ndarray)
+            and not isinstance(value, np.memmap)
+        ):
+            self.disk.put(key, value)
+        if nbytes > self.max_bytes:
+            logger.info("Not caching %s: %d bytes exceeds cache budget", key[1:], nbytes)
+            return
+        self._store(key, value, nbytes)
+
+    def _store(self, key: tuple, value: Any, nbytes: int) -> None:
+        if isinstance(value, np.ndarray):
+            value.setflags(write=False)
+        with self._lock:
+            if key in self._entries:
+                self._release(self._entries.pop(key))
+            self._entries[key] = value
+            size = self._sizes.setdefault(id(value), [0, nbytes])
+            if size[0] == 0:
+                self.current_bytes += nbytes
+            size[0] += 1
+            while self.current_bytes > self.max_bytes:
+                self._release(self._entries.popitem(last=False)[1])
+
+    def _release(self, value: Any) -> None:
+        """Drop one key's hold on `value`; its size is freed with the last one."""
+        size = self._sizes[id(value)]
+        size[0] -= 1
+        if size[0] == 0:
+            del self._sizes[id(value)]
+            self.current_bytes -= size[1]
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _create_image_cache() -> DecodedImageCache:
+    """Create the process-wide cache, backed by disk if USAF_DISK_CACHE_DIR is set."""
+    disk = None
+    if IMAGE_DISK_CACHE_DIR:
+        try:
+            disk = DiskImageCache(os.path.expanduser(IMAGE_DISK_CACHE_DIR))
+        except OSError as e:
+            logger.warning(f"Disk image cache disabled: {e}")
+    return DecodedImageCache(disk=disk)
+
+
+_image_cache = _create_image_cache()
+
+# --- Background Prefetch ---
+
+# Decoders (tifffile, OpenCV) and most NumPy reductions release the GIL, so a
+# thread pool decodes and normalizes several uploads concurrently
+PREFETCH_WORKERS = min(8, os.cpu_count() or 1)
+_prefetch_executor = ThreadPoolExecutor(
+    max_workers=PREFETCH_WORKERS, thread_name_prefix="usaf-prefetch"
+)
+_prefetch_futures: dict[str, Future] = {}  # keyed by content hash
+_prefetch_lock = threading.Lock()
+
 # --- Utility Functions ---
 
 
-def _get_effective_bit_depth(image: np.ndarray) -> int:
+def _log_debug_statistics(label: str, array: np.ndarray) -> None:
+    """Log the shape and value range of `array` if debug statistics are enabled."""
+    if DEBUG_STATISTICS and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "%s: shape=%s, dtype=%s, range=%s-%s",
+            label,
+            array.shape,
+            array.dtype,
+            np.min(array),
+            np.max(array),
+        )
+
+
+def _get_effective_bit_depth(image: np.ndarray, stats: "ImageStats | None" = None) -> int:
     """
     Estimate the effective bit depth of an image by examining its maximum value.
     For example, a 16-bit image with max value 4095 is likely 12-bit digitized.
+    The maximum is taken from `stats` when given.
     """
     if not hasattr(image, "dtype"):
         return 8
     if image.dtype == np.uint8:
         return 8
-    max_val = np.max(image)
+    max_val = stats.max if stats is not None else np.max(image)
     return next(
         (
             bits
@@ -100,6 +400,60 @@ def _get_effective_bit_depth(image: np.ndarray) -> int:
     )
 
 
+def _tiff_bit_depth(tif: tifffile.TiffFile) -> int | None:
+    """
+    Digitizer bit depth recorded in a TIFF, or None if the file doesn't say.
+
+    ScanImage headers give the ADC resolution directly. Otherwise BitsPerSample
+    or MaxSampleValue are used, but only when they are narrower than the sample
+    container: a 16-bit TIFF usually says BitsPerSample=16 whatever its source.
+    """
+    page = tif.pages[0]
+    if page.dtype is None or page.dtype.kind not in "ui":
+        return None
+    if tif.is_scanimage:
+        framedata = (tif.scanimage_metadata or {}).get("FrameData", {})
+        for key in (
+            "SI.hChannels.channelAdcResolution",
+            "SI.hScan2D.channelsAdcResolution",
+        ):
+            resolution = framedata.get(key)
+            if isinstance(resolution, (list, tuple)):
+                resolution = max(resolution, default=None)
+            if isinstance(resolution, (int, float)) and resolution > 0:
+                return int(resolution)
+    container_bits = page.dtype.itemsize * 8
+    if 0 < page.bitspersample < container_bits:
+        return int(page.bitspersample)
+    max_sample = page.tags.valueof(281)  # MaxSampleValue
+    if isinstance(max_sample, tuple):
+        max_sample = max(max_sample, default=None)
+    if max_sample and 0 < max_sample < (1 << container_bits) - 1:
+        return int(max_sample).bit_length()
+    return None
+
+
+def _read_bit_depth_metadata(image_source) -> int | None:
+    """
+    Read the digitizer bit depth from the metadata of a TIFF path or upload.
+
+    Only the TIFF header is parsed; pixel data is never read. Returns None for
+    other formats or when the metadata doesn't record the bit depth.
+    """
+    name = image_source if isinstance(image_source, str) else image_source.name
+    if not name.lower().endswith((".tif", ".tiff")):
+        return None
+    try:
+        if isinstance(image_source, str):
+            with tifffile.TiffFile(image_source) as tif:
+                return _tiff_bit_depth(tif)
+        with tifffile.TiffFile(io.BytesIO(image_source.getvalue())) as tif:
+            return _tiff_bit_depth(tif)
+    except Exception as e:
+        logger.warning(f"Could not read bit depth from {name}: {e}")
+        return None
+
+
 def parse_filename_for_defaults(filename: str) -> dict[str, Any]:
     """
     Parse filename to extract magnification and USAF target values.
@@ -174,51 +528,139 @@ def normalize_to_uint8(
     normalize=False,
     saturated_pixels=0.5,
     equalize_histogram=False,
+    bit_depth=None,
+    stats=None,
+    equalization_method=DEFAULT_EQUALIZATION_METHOD,
+    lean=None,
 ):
     """
     Normalize image to uint8 (0-255) range with ImageJ-like contrast enhancement options.
+
+    `bit_depth` is the digitizer depth used when neither autoscaling nor
+    normalizing; if not given, it is estimated from the image's maximum.
+    `stats` are the image's `ImageStats`, if already computed; they save the
+    min/max reductions and the autoscale histogram. `equalization_method` is
+    one of `EQUALIZATION_METHODS`; the OpenCV methods fall back to their
+    scikit-image counterparts for images that are not 8- or 16-bit.
+
+    With `lean` (default `MEMORY_LEAN`), float images are rescaled in float32;
+    the output may then differ by one level from the float64 result.
     """
     if image is None or image.size == 0:
         return np.zeros((1, 1), dtype=np.uint8)
 
-    image_copy = _prepare_image_copy(image)
-    is_multichannel = image_copy.ndim > 2 and image_copy.shape[-1] <= 4
+    if (
+        equalize_histogram
+        and equalization_method != "skimage"
+        and image.dtype in (np.uint8, np.uint16)
+        and (image.ndim == 2 or _is_multichannel(image))
+    ):
+        # OpenCV works on the integer source: no copy and no float intermediates
+        equalized = _apply_opencv_equalization(
+            image, _is_multichannel(image), equalization_method, stats
+        )
+        return 255 - equalized if invert else equalized
+
+    if (
+        not equalize_histogram
+        and image.dtype in (np.uint8, np.uint16)
+        and (image.dtype != np.uint8 or normalize)
+    ):
+        # Lookup-table path: no copy of the source and no float intermediates
+        is_multichannel = _is_multichannel(image)
+        low, high = _normalization_bounds(
+            image, is_multichannel, autoscale, normalize, saturated_pixels, bit_depth, stats
+        )
+        luts = _rescale_luts(image.dtype, low, high, invert)
+        return _apply_luts(image, is_multichannel, luts)
+
+    if lean is None:
+        lean = MEMORY_LEAN
+    image_copy = _prepare_image_copy(image, stats, lean=lean)
+    if image_copy.dtype.kind == "f":
+        stats = None  # Float copies are rescaled, so their statistics differ
+    is_multichannel = _is_multichannel(image_copy)
+    # The rescale may work in place on a buffer nobody else sees
+    owned = image_copy is not image
 
     if equalize_histogram:
-        image_copy = _apply_histogram_equalization(image_copy, is_multichannel)
+        image_copy = _apply_histogram_equalization(
+            image_copy, is_multichannel, adaptive=equalization_method == "clahe"
+        )
     elif image_copy.dtype != np.uint8 or normalize:
-        image_copy = _apply_normalization_strategies(
-            image_copy, is_multichannel, autoscale, normalize, saturated_pixels
+        low, high = _normalization_bounds(
+            image_copy,
+            is_multichannel,
+            autoscale,
+            normalize,
+            saturated_pixels,
+            bit_depth,
+            stats,
         )
+        image_copy = _rescale_to_uint8(image_copy, low, high, overwrite=owned)
 
     if invert:
         image_copy = 255 - image_copy
+    elif image_copy is image:
+        image_copy = image.copy()  # Never hand out the caller's array
 
     return image_copy
 
 
-def _prepare_image_copy(image: np.ndarray) -> np.ndarray:
-    """Prepare a copy of the image, normalizing float images to 0-1 range."""
-    image_copy = image.copy()
-    if np.issubdtype(image_copy.dtype, np.floating) and (np.max(image_copy) > 1.0 or np.min(image_copy) < -1.0):
-        min_val, max_val = np.min(image_copy), np.max(image_copy)
-        if max_val > min_val:
-            image_copy = (image_copy - min_val) / (max_val - min_val)
-        else:
-            image_copy = np.zeros_like(image_copy)
-    return image_copy
+def _normalization_uses_stats(
+    image: np.ndarray,
+    normalize: bool,
+    equalize_histogram: bool,
+    equalization_method: str,
+) -> bool:
+    """Whether `normalize_to_uint8` reads its `stats` argument for these settings."""
+    if np.issubdtype(image.dtype, np.floating):
+        return True  # Range check before rescaling
+    if equalize_histogram:
+        # Only global OpenCV equalization of 16-bit images reuses the histogram
+        return equalization_method == "opencv" and image.dtype == np.uint16
+    return image.dtype != np.uint8 or normalize
+
+
+def _prepare_image_copy(
+    image: np.ndarray,
+    stats: "ImageStats | None" = None,
+    lean: bool = False,
+) -> np.ndarray:
+    """
+    Prepare the image for rescaling, normalizing float images to 0-1 range.
+
+    Images that need no change are returned as they are, since the following
+    steps only read them. Float images outside 0-1 are rescaled in a single
+    new buffer (float32 if `lean`).
+    """
+    if not np.issubdtype(image.dtype, np.floating):
+        return image
+    if stats is None:
+        stats = ImageStats(image)
+    min_val, max_val = stats.min, stats.max
+    if not (max_val > 1.0 or min_val < -1.0):
+        return image
+    dtype = np.float32 if lean else image.dtype
+    if max_val <= min_val:
+        return np.zeros(image.shape, dtype=dtype)
+    scratch = np.empty(image.shape, dtype=dtype)
+    np.subtract(image, min_val, out=scratch, casting="same_kind")
+    scratch /= (max_val - min_val).astype(dtype)
+    return scratch
 
 
 def _apply_histogram_equalization(
-    image: np.ndarray, is_multichannel: bool
+    image: np.ndarray, is_multichannel: bool, adaptive: bool = False
 ) -> np.ndarray:
-    """Apply histogram equalization to the image."""
+    """Apply histogram equalization (CLAHE if `adaptive`) to the image with scikit-image."""
+    equalize = exposure.equalize_adapthist if adaptive else exposure.equalize_hist
     if is_multichannel:
-        result = np.zeros_like(image, dtype=np.uint8)
+        result = np.empty(image.shape, dtype=np.uint8)
         for c in range(image.shape[-1]):
             channel = image[..., c]
             try:
-                equalized = exposure.equalize_hist(channel)
+                equalized = equalize(channel)
                 result[..., c] = img_as_ubyte(equalized)
             except Exception as e:
                 logger.warning(f"Error equalizing histogram for channel {c}: {e}")
@@ -226,124 +668,368 @@ def _apply_histogram_equalization(
         return result
     else:
         try:
-            equalized = exposure.equalize_hist(image)
+            equalized = equalize(image)
             return img_as_ubyte(equalized)
         except Exception as e:
             logger.warning(f"Error equalizing histogram: {e}")
             return image
 
 
-def _apply_normalization_strategies(
+def _apply_opencv_equalization(
+    image: np.ndarray,
+    is_multichannel: bool,
+    method: str,
+    stats: "ImageStats | None" = None,
+) -> np.ndarray:
+    """
+    Equalize each channel of a uint8 or uint16 image with OpenCV.
+
+    Args:
+        image: 2D or multichannel uint8/uint16 image
+        is_multichannel: Whether the last axis holds channels
+        method: "opencv" for global equalization or "clahe" for tiled CLAHE
+        stats: The image's `ImageStats`, whose histogram is reused for uint16
+
+    Returns:
+        The equalized uint8 image
+    """
+    result = np.empty(image.shape, dtype=np.uint8)
+    clahe = None
+    if method == "clahe":
+        clahe = cv2.createCLAHE(clipLimit=CLAHE_CLIP_LIMIT, tileGridSize=CLAHE_TILE_GRID)
+    for c in range(image.shape[-1] if is_multichannel else 1):
+        channel = image[..., c] if is_multichannel else image
+        out = result[..., c] if is_multichannel else result
+        if clahe is not None:
+            equalized = clahe.apply(np.ascontiguousarray(channel))
+            out[...] = equalized >> 8 if equalized.dtype == np.uint16 else equalized
+        elif channel.dtype == np.uint8:
+            out[...] = cv2.equalizeHist(np.ascontiguousarray(channel))
+        else:
+            if stats is not None and stats.histogram is not None:
+                counts = stats.histogram[c]
+            else:
+                counts = np.bincount(channel.ravel(), minlength=1 << 16)
+            np.take(_equalization_lut(counts), channel, out=out, mode="clip")
+    return result
+
+
+def _equalization_lut(counts: np.ndarray) -> np.ndarray:
+    """
+    uint8 equalization lookup table for a value histogram.
+
+    Uses `cv2.equalizeHist`'s mapping (float32 arithmetic and rounding
+    included), so 16-bit images equalize like 8-bit ones do in OpenCV.
+    """
+    lut = np.zeros(len(counts), dtype=np.uint8)
+    occupied = np.flatnonzero(counts)
+    if len(occupied) == 0:
+        return lut
+    first = occupied[0]
+    total = int(counts.sum())
+    if counts[first] == total:
+        # A flat image keeps its value, scaled to 8 bits
+        lut[first] = first * 255 // (len(counts) - 1)
+        return lut
+    scale = np.float32(255) / np.float32(total - counts[first])
+    cumulative = np.cumsum(counts) - counts[first]
+    levels = np.rint(cumulative.astype(np.float32) * scale)
+    lut[first:] = np.clip(levels[first:], 0, 255)
+    return lut
+
+
+def _normalization_bounds(
     image: np.ndarray,
     is_multichannel: bool,
     autoscale: bool,
     normalize: bool,
     saturated_pixels: float,
-) -> np.ndarray:
-    """Apply different normalization strategies based on parameters."""
-    bit_depth = _get_effective_bit_depth(image)
+    bit_depth: int | None = None,
+    stats: "ImageStats | None" = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Input range mapped onto 0-255 by the normalization strategy in use.
 
+    Returns:
+        (low, high), each with one value per channel or a single value
+    """
     if autoscale:
-        return _normalize_autoscale(image, is_multichannel, saturated_pixels)
+        histogram = stats.histogram if stats is not None else None
+        return _autoscale_bounds(image, is_multichannel, saturated_pixels, histogram)
     elif normalize:
-        return _normalize_full_range(image, is_multichannel)
+        if stats is None:
+            stats = ImageStats(image)
+        return stats.channel_min, stats.channel_max
+    elif image.dtype.kind == "f":
+        # Float images arrive rescaled to 0-1 by _prepare_image_copy; their
+        # digitizer depth no longer applies
+        return np.array(0.0), np.array(1.0)
     else:
-        return _normalize_by_bit_depth(image, is_multichannel, bit_depth)
+        if bit_depth is None:
+            bit_depth = _get_effective_bit_depth(image, stats)
+        return np.array(0), np.array((1 << bit_depth) - 1)
 
 
-def _normalize_channel_autoscale(
-    channel: np.ndarray, saturated_pixels: float
-) -> np.ndarray:
-    """Autoscale a single channel using percentile-based contrast stretching."""
-    try:
-        p_low, p_high = saturated_pixels / 2, 100 - saturated_pixels / 2
-        p_min, p_max = np.percentile(channel, (p_low, p_high))
-        if p_max > p_min:
-            rescaled = exposure.rescale_intensity(
-                channel, in_range=(p_min, p_max), out_range=(0, 255)
-            )
-            return img_as_ubyte(rescaled)
-        return np.zeros_like(channel, dtype=np.uint8)
-    except Exception as e:
-        logger.warning(f"Error autoscaling channel: {e}")
-        return _normalize_channel_fallback(channel)
+def _is_multichannel(image: np.ndarray) -> bool:
+    """Whether the last axis holds colour channels (up to 4) rather than pixels."""
+    return image.ndim > 2 and image.shape[-1] <= 4
+
 
+def _channel_pixels(image: np.ndarray, is_multichannel: bool) -> np.ndarray:
+    """View the image as (pixels, channels), so axis-0 reductions are per channel."""
+    if is_multichannel:
+        return image.reshape(-1, image.shape[-1])
+    return image.reshape(-1, 1)
 
-def _normalize_autoscale(
-    image: np.ndarray, is_multichannel: bool, saturated_pixels: float
+
+def _rescale_to_uint8(
+    image: np.ndarray, low: np.ndarray, high: np.ndarray, overwrite: bool = False
 ) -> np.ndarray:
-    """Autoscale image using percentile-based contrast stretching."""
-    if not is_multichannel:
-        return _normalize_channel_autoscale(image, saturated_pixels)
-    result = np.zeros_like(image, dtype=np.uint8)
-    for c in range(image.shape[-1]):
-        result[..., c] = _normalize_channel_autoscale(
-            image[..., c], saturated_pixels
-        )
+    """
+    Map [low, high] linearly onto 0-255 for all channels in a single pass.
+
+    `low` and `high` hold one value per channel (broadcast over the last axis).
+    Values outside the range are clipped, channels with an empty range come out
+    black, and values are rounded like `img_as_ubyte`. With `overwrite`, a
+    float32 `image` is used as the scratch buffer.
+    """
+    low = np.asarray(low, dtype=np.float32)
+    span = np.asarray(high, dtype=np.float32) - low
+    scale = np.divide(np.float32(255), span, out=np.zeros_like(span), where=span > 0)
+    if overwrite and image.dtype == np.float32 and image.flags.writeable:
+        scaled = np.subtract(image, low, out=image)
+    else:
+        scaled = np.subtract(image, low, dtype=np.float32)
+    scaled *= scale
+    np.rint(scaled, out=scaled)
+    np.clip(scaled, 0, 255, out=scaled)
+    result = np.empty(scaled.shape, dtype=np.uint8)
+    np.copyto(result, scaled, casting="unsafe")
     return result
 
 
-def _normalize_channel_full_range(channel: np.ndarray) -> np.ndarray:
-    """Normalize a single channel to the full 0-255 range."""
-    try:
-        min_val, max_val = np.min(channel), np.max(channel)
-        if max_val > min_val:
-            normalized = exposure.rescale_intensity(
-                channel, in_range=(min_val, max_val), out_range=(0, 255)
-            )
-            return img_as_ubyte(normalized)
-        return np.zeros_like(channel, dtype=np.uint8)
-    except Exception as e:
-        logger.warning(f"Error normalizing channel to full range: {e}")
-        return np.zeros_like(channel, dtype=np.uint8)
+def _rescale_luts(
+    dtype: np.dtype, low: np.ndarray, high: np.ndarray, invert: bool = False
+) -> np.ndarray:
+    """
+    Lookup tables equivalent to `_rescale_to_uint8` (optionally inverted).
 
+    Every possible value of the 8- or 16-bit `dtype` goes through the same
+    float32 arithmetic as the image would, so the results are identical.
 
-def _normalize_full_range(image: np.ndarray, is_multichannel: bool) -> np.ndarray:
-    """Normalize image to the full 0-255 range."""
-    if not is_multichannel:
-        return _normalize_channel_full_range(image)
-    result = np.zeros_like(image, dtype=np.uint8)
+    Returns:
+        Array of shape (channels, 256 or 65536), one row per channel; a single
+        row when `low` and `high` are single values
+    """
+    values = np.arange(np.iinfo(dtype).max + 1, dtype=dtype)[:, None]
+    luts = np.ascontiguousarray(_rescale_to_uint8(values, low, high).T)
+    if invert:
+        np.subtract(255, luts, out=luts)
+    return luts
+
+
+def _apply_luts(image: np.ndarray, is_multichannel: bool, luts: np.ndarray) -> np.ndarray:
+    """Map an 8- or 16-bit image through per-channel `_rescale_luts` tables."""
+    if image.dtype == np.uint8 and (image.ndim == 2 or is_multichannel):
+        if luts.shape[0] > 1:  # One table per channel, as a 1x256 multi-channel Mat
+            lut = np.ascontiguousarray(luts.T).reshape(1, 256, -1)
+        else:
+            lut = luts[0]
+        return cv2.LUT(np.ascontiguousarray(image), lut).reshape(image.shape)
+    if luts.shape[0] == 1:
+        return np.take(luts[0], image, mode="clip")
+    result = np.empty(image.shape, dtype=np.uint8)
     for c in range(image.shape[-1]):
-        result[..., c] = _normalize_channel_full_range(image[..., c])
+        result[..., c] = np.take(luts[c], image[..., c], mode="clip")
     return result
 
 
-def _normalize_channel_by_bit_depth(channel: np.ndarray, bit_depth: int) -> np.ndarray:
-    """Scale a single channel to its digitization bit depth."""
-    max_val = (1 << bit_depth) - 1
-    try:
-        rescaled = exposure.rescale_intensity(
-            channel, in_range=(0, max_val), out_range=(0, 255)
-        )
-        return img_as_ubyte(rescaled)
-    except Exception as e:
-        logger.warning(f"Error scaling channel by bit depth: {e}")
-        return np.clip((channel / max_val * 255), 0, 255).astype(np.uint8)
+def _has_value_histogram(image: np.ndarray) -> bool:
+    """Whether percentiles can come from a histogram with one bin per value."""
+    return image.dtype.kind in "ui" and image.dtype.itemsize <= 2
 
 
-def _normalize_by_bit_depth(
-    image: np.ndarray, is_multichannel: bool, bit_depth: int
+def _channel_histograms(image: np.ndarray) -> np.ndarray:
+    """
+    Count every possible value of an 8- or 16-bit integer image, per channel.
+
+    Returns:
+        Array where [c, v - min] is the number of pixels of channel c with
+        value v, min being the smallest value of the image's dtype
+    """
+    info = np.iinfo(image.dtype)
+    pixels = _channel_pixels(image, _is_multichannel(image))
+    counts = np.empty((pixels.shape[1], info.max - info.min + 1), dtype=np.int64)
+    for c in range(pixels.shape[1]):
+        values = pixels[:, c]
+        if info.min:
+            values = values.astype(np.int32) - info.min
+        counts[c] = np.bincount(values, minlength=counts.shape[1])
+    return counts
+
+
+def _histogram_percentiles(
+    counts: np.ndarray, offset: int, percentiles: tuple[float, ...]
 ) -> np.ndarray:
-    """Scale image to its digitization bit depth."""
-    if not is_multichannel:
-        return _normalize_channel_by_bit_depth(image, bit_depth)
-    result = np.zeros_like(image, dtype=np.uint8)
-    for c in range(image.shape[-1]):
-        result[..., c] = _normalize_channel_by_bit_depth(image[..., c], bit_depth)
+    """
+    Per-channel percentiles from `_channel_histograms`, in O(number of values).
+
+    Interpolates between neighbouring ranks exactly like `np.percentile`'s
+    default (linear) method, so the results are identical.
+
+    Args:
+        counts: Histograms as returned by `_channel_histograms`
+        offset: Value of the first bin (the dtype's minimum)
+        percentiles: Percentiles to compute, between 0 and 100
+
+    Returns:
+        Array of shape (len(percentiles), channels)
+    """
+    cdf = np.cumsum(counts, axis=1)
+    n = cdf[:, -1]
+    virtual = (n - 1) * (np.asarray(percentiles, dtype=np.float64)[:, None] / 100)
+    below = np.clip(np.floor(virtual), 0, n - 1)
+    above = np.minimum(below + 1, n - 1)
+    gamma = virtual - below
+    result = np.empty(virtual.shape, dtype=np.float64)
+    for c in range(counts.shape[0]):
+        # Value at sorted rank k: first value whose cumulative count exceeds k
+        a = np.searchsorted(cdf[c], below[:, c], side="right") + offset
+        b = np.searchsorted(cdf[c], above[:, c], side="right") + offset
+        a, b, t = a.astype(np.float64), b.astype(np.float64), gamma[:, c]
+        diff = b - a
+        result[:, c] = np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
     return result
 
 
-def _normalize_channel_fallback(channel: np.ndarray) -> np.ndarray:
-    """Fallback simple normalization for a channel."""
-    min_val, max_val = np.min(channel), np.max(channel)
-    if max_val > min_val:
-        return np.clip(
-            ((channel - min_val) / (max_val - min_val) * 255), 0, 255
-        ).astype(np.uint8)
-    return np.zeros_like(channel, dtype=np.uint8)
+def _autoscale_bounds(
+    image: np.ndarray,
+    is_multichannel: bool,
+    saturated_pixels: float,
+    histogram: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Percentile bounds for ImageJ-like autoscaling, per channel.
+
+    Percentiles of 8- and 16-bit integer images come from a value histogram
+    (`histogram`, or computed here) instead of a full-frame selection.
+    """
+    p_low, p_high = saturated_pixels / 2, 100 - saturated_pixels / 2
+    if _has_value_histogram(image):
+        if histogram is None:
+            histogram = _channel_histograms(image)
+        p_min, p_max = _histogram_percentiles(
+            histogram, int(np.iinfo(image.dtype).min), (p_low, p_high)
+        )
+    else:
+        p_min, p_max = np.percentile(
+            _channel_pixels(image, is_multichannel), (p_low, p_high), axis=0
+        )
+    return p_min, p_max
+
+
+class ImageStats:
+    """
+    Intensity statistics of an image, computed once and shared by every step.
+
+    For 8- and 16-bit integer images a single bincount per channel gives the
+    value histogram, and the per-channel min and max are read off its first and
+    last occupied bins. Other images get one min and one max reduction and no
+    histogram.
+    """
+
+    def __init__(self, image: np.ndarray):
+        self.shape = image.shape
+        self.dtype = image.dtype
+        self.histogram: np.ndarray | None = None
+        if _has_value_histogram(image):
+            self.histogram = _channel_histograms(image)
+            offset = int(np.iinfo(image.dtype).min)
+            occupied = self.histogram > 0
+            first = occupied.argmax(axis=1)
+            last = occupied.shape[1] - 1 - occupied[:, ::-1].argmax(axis=1)
+            self.channel_min = (first + offset).astype(image.dtype)
+            self.channel_max = (last + offset).astype(image.dtype)
+        else:
+            pixels = _channel_pixels(image, _is_multichannel(image))
+            self.channel_min = pixels.min(axis=0)
+            self.channel_max = pixels.max(axis=0)
+        self.min = self.channel_min.min()
+        self.max = self.channel_max.max()
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the statistics, for cache accounting."""
+        return self.histogram.nbytes if self.histogram is not None else 0
+
+
+class RoiStats(ImageStats):
+    """`ImageStats` of an ROI plus its column-max intensity profile."""
+
+    def __init__(self, roi: np.ndarray):
+        super().__init__(roi)
+        self.column_max = np.max(roi, axis=0)
+        self.profile_min = self.column_max.min()
+        self.profile_max = self.column_max.max()
+
+    @property
+    def nbytes(self) -> int:
+        return super().nbytes + self.column_max.nbytes
+
+
+# Content hashes of uploads, keyed by Streamlit's per-upload file_id
+_upload_content_hashes: dict[str, str] = {}
+_upload_content_hashes_lock = threading.Lock()
+_MAX_UPLOAD_CONTENT_HASHES = 1024
+
+
+@functools.lru_cache(maxsize=256)
+def _hash_file_contents(image_path: str, mtime_ns: int, size: int) -> str:
+    """Hash a file's bytes; mtime and size are part of the key to detect edits."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(image_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_image_content_hash(image_file) -> str:
+    """
+    Return a hash of the image file's contents, used as the image cache key.
+
+    Hashes are memoized per upload (by file_id) and per path (by mtime and
+    size), so the many calls made on each Streamlit rerun are cheap.
+    """
+    if isinstance(image_file, str):
+        stat = os.stat(image_file)
+        return _hash_file_contents(image_file, stat.st_mtime_ns, stat.st_size)
+
+    file_id = getattr(image_file, "file_id", None)
+    if file_id is not None:
+        with _upload_content_hashes_lock:
+            content_hash = _upload_content_hashes.get(file_id)
+        if content_hash is not None:
+            return content_hash
+    # Hash outside the lock so large uploads don't block other script threads
+    content_hash = hashlib.blake2b(image_file.getvalue(), digest_size=16).hexdigest()
+    if file_id is not None:
+        with _upload_content_hashes_lock:
+            if (
+                file_id not in _upload_content_hashes
+                and len(_upload_content_hashes) >= _MAX_UPLOAD_CONTENT_HASHES
+            ):
+                _upload_content_hashes.pop(next(iter(_upload_content_hashes)))
+            _upload_content_hashes[file_id] = content_hash
+    return content_hash
 
 
 def get_unique_id_for_image(image_file) -> str:
+    """
+    Session key suffix for an image, derived from its filename and contents.
+
+    Two different files with the same name get different IDs; an unreadable
+    file falls back to a filename-only ID.
+    """
     try:
         if isinstance(image_file, str):
             filename = os.path.basename(image_file)
@@ -351,7 +1037,12 @@ def get_unique_id_for_image(image_file) -> str:
             filename = (
                 image_file.name if hasattr(image_file, "name") else id(image_file)
             )
-        short_hash = hashlib.md5(filename.encode()).hexdigest()[:8]
+        try:
+            content_hash = get_image_content_hash(image_file)
+        except Exception as e:
+            logger.warning(f"Could not hash image contents for {filename}: {e}")
+            content_hash = ""
+        short_hash = hashlib.md5(f"{filename}:{content_hash}".encode()).hexdigest()[:8]
         return f"img_{short_hash}"
     except Exception as e:
         logger.error(f"Error generating unique ID: {e}")
@@ -362,7 +1053,17 @@ def load_default_image():
     return DEFAULT_IMAGE_PATH if os.path.exists(DEFAULT_IMAGE_PATH) else None
 
 
-def process_uploaded_file(uploaded_file) -> tuple[np.ndarray | None, str | None]:
+def process_uploaded_file(
+    uploaded_file,
+) -> tuple[np.ndarray | None, "ImagePipeline | None"]:
+    """
+    Decode an uploaded file (or image path) and normalize it for display.
+
+    Returns:
+        (display_image, pipeline): the normalized RGB uint8 display image and
+        the image's `ImagePipeline`, which analysis reuses instead of decoding
+        and normalizing the file again
+    """
     if uploaded_file is None:
         return None, None
 
@@ -370,16 +1071,101 @@ def process_uploaded_file(uploaded_file) -> tuple[np.ndarray | None, str | None]
     settings = _get_image_processing_settings(unique_id)
 
     try:
-        if isinstance(uploaded_file, str):
-            return _process_image_from_path(uploaded_file, unique_id, settings)
-        else:
-            return _process_image_from_buffer(uploaded_file, unique_id, settings)
+        if isinstance(uploaded_file, str) and not os.path.exists(uploaded_file):
+            st.error(f"File not found: {uploaded_file}")
+            return None, None
+        content_hash = get_image_content_hash(uploaded_file)
+        _wait_for_prefetch(content_hash)
+
+        pipeline = _get_image_pipeline(uploaded_file, content_hash)
+        if pipeline is None:
+            return None, None
+        st.session_state[f"bit_depth_{unique_id}"] = pipeline.bit_depth
+
+        processed_image = _normalize_and_prepare_image(pipeline, settings)
+        if processed_image is None:
+            return None, None
+
+        return processed_image, pipeline
     except Exception as e:
         logger.error(f"Error processing file: {e}")
         st.error(f"Error processing file: {e}")
         return None, None
 
 
+def _get_image_pipeline(
+    uploaded_file, content_hash: str, report_errors: bool = True
+) -> "ImagePipeline | None":
+    """
+    Build the image's pipeline, decoding it only if the raw array isn't cached.
+
+    With `report_errors=False` (off the script thread) decode errors are only
+    logged, not shown in the app.
+    """
+    raw_key = (content_hash, "raw")
+    image_array = _image_cache.get(raw_key)
+    if image_array is None:
+        if isinstance(uploaded_file, str):
+            image_array = _load_image_array(uploaded_file, report_errors=report_errors)
+        else:
+            image_array = _decode_uploaded_buffer(
+                uploaded_file, report_errors=report_errors
+            )
+        if image_array is None:
+            return None
+        _image_cache.put(raw_key, image_array)
+    return ImagePipeline(image_array, content_hash=content_hash, source=uploaded_file)
+
+
+def _prefetch_image(uploaded_file, content_hash: str, settings: dict) -> None:
+    """Decode and normalize one image into the shared cache (runs in a worker)."""
+    pipeline = _get_image_pipeline(uploaded_file, content_hash, report_errors=False)
+    if pipeline is not None:
+        pipeline.display_level(settings)
+
+
+def prefetch_images(uploaded_files: list) -> None:
+    """
+    Start decoding and normalizing every image that isn't cached yet.
+
+    Each image is submitted to the prefetch thread pool with its current display
+    settings; `process_uploaded_file` later waits for the image's job and reads
+    the results from the cache. Errors are not reported from the workers: a
+    failed prefetch just leaves the cache empty and the image is decoded again
+    (and the error shown) on the main thread.
+    """
+    with _prefetch_lock:
+        for content_hash in [h for h, f in _prefetch_futures.items() if f.done()]:
+            del _prefetch_futures[content_hash]
+
+    for uploaded_file in uploaded_files:
+        try:
+            content_hash = get_image_content_hash(uploaded_file)
+        except Exception as e:
+            logger.warning(f"Not prefetching image: {e}")
+            continue
+        settings = _get_image_processing_settings(get_unique_id_for_image(uploaded_file))
+        display_key = (content_hash, "display", *_processing_params_key(settings))
+        with _prefetch_lock:
+            if content_hash in _prefetch_futures or _image_cache.get(display_key) is not None:
+                continue
+            _prefetch_futures[content_hash] = _prefetch_executor.submit(
+                _prefetch_image, uploaded_file, content_hash, settings
+            )
+
+
+def _wait_for_prefetch(content_hash: str) -> None:
+    """Block until a pending prefetch of this image (if any) has finished."""
+    with _prefetch_lock:
+        future = _prefetch_futures.pop(content_hash, None)
+    if future is None:
+        return
+    try:
+        future.result()
+    except Exception as e:
+        logger.warning(f"Prefetch failed, decoding on the main thread: {e}")
+
+
 def _get_image_processing_settings(unique_id: str) -> dict:
     """Get image processing settings from session state."""
     return {
@@ -388,122 +1174,239 @@ def _get_image_processing_settings(unique_id: str) -> dict:
         "normalize": st.session_state.get(f"normalize_{unique_id}", False),
         "saturated_pixels": st.session_state.get(f"saturated_pixels_{unique_id}", 0.5),
         "equalize_histogram": st.session_state.get(
-            f"equalize_histogram_{unique_id}", False
+            f"equalize_histogram_{unique_id}", True
+        ),
+        "equalization_method": st.session_state.get(
+            f"equalization_method_{unique_id}", DEFAULT_EQUALIZATION_METHOD
         ),
     }
 
 
-def _load_image_array(image_path: str) -> np.ndarray | None:
-    """Load image from path into a numpy array."""
+def _read_tiff_page(
+    tif: tifffile.TiffFile, page_index: int = 0, buffer: bytes | None = None
+) -> np.ndarray:
+    """
+    Read a TIFF page, memory-mapping it when the pixels are stored uncompressed.
+
+    A mapped page is only paged in from disk where it is sliced, so cropping an
+    ROI out of a large frame never decodes the rest of it. When the TIFF was
+    opened from an in-memory `buffer`, uncompressed pages are returned as a
+    zero-copy view of that buffer instead. Compressed or otherwise unmappable
+    pages fall back to a full decode.
+    """
+    page = tif.pages[page_index]
+    dtype = np.dtype(tif.byteorder + page.dtype.char) if page.dtype else None
+    if page.is_memmappable:
+        return np.memmap(
+            tif.filehandle.path,
+            dtype=dtype,
+            mode="r",
+            offset=page.dataoffsets[0],
+            shape=page.shape,
+        )
+    if buffer is not None and page.is_final and dtype is not None:
+        return np.frombuffer(
+            buffer,
+            dtype=dtype,
+            count=int(np.prod(page.shape)),
+            offset=page.dataoffsets[0],
+        ).reshape(page.shape)
+    return page.asarray()
+
+
+def _scanimage_channel_count(tif: tifffile.TiffFile) -> int:
+    """Number of channels ScanImage interleaved page by page (1 for other TIFFs)."""
+    if not tif.is_scanimage:
+        return 1
+    try:
+        saved = tif.scanimage_metadata["FrameData"]["SI.hChannels.channelSave"]
+    except (KeyError, TypeError):
+        return 1
+    return len(saved) if isinstance(saved, (list, tuple)) else 1
+
+
+def iter_tiff_frames(
+    image_path: str, channel: int | None = None, frames: slice | None = None
+) -> Iterator[np.ndarray]:
+    """
+    Lazily yield the frames of a multi-page TIFF, one page at a time.
+
+    ScanImage stacks store channels interleaved (frame 0 ch 0, frame 0 ch 1, ...),
+    so `channel` selects every n-th page starting at that channel. `frames`
+    then slices the selected frames, e.g. ``slice(10, 20)`` for a z-range.
+    Only the current frame is held in memory; uncompressed pages are memory-mapped.
+
+    Args:
+        image_path: Path to the TIFF file
+        channel: Zero-based channel index, or None for every page
+        frames: Optional slice applied to the (channel-selected) frame sequence
+
+    Yields:
+        2D (or 3D for RGB pages) frame arrays
+    """
+    with tifffile.TiffFile(image_path) as tif:
+        # Don't let tifffile keep every parsed page alive for the whole stack
+        tif.pages.cache = False
+        page_indices = range(len(tif.pages))
+        if channel is not None:
+            n_channels = _scanimage_channel_count(tif)
+            if not 0 <= channel < n_channels:
+                raise ValueError(
+                    f"Channel {channel} out of range for {n_channels}-channel TIFF"
+                )
+            page_indices = page_indices[channel::n_channels]
+        if frames is not None:
+            page_indices = page_indices[frames]
+        for page_index in page_indices:
+            yield _read_tiff_page(tif, page_index)
+
+
+def project_tiff_frames(
+    image_path: str,
+    method: str = "mean",
+    channel: int | None = None,
+    frames: slice | None = None,
+) -> np.ndarray | None:
+    """
+    Reduce a TIFF stack to a single frame in constant memory.
+
+    Args:
+        image_path: Path to the TIFF file
+        method: 'mean' (float64 average) or 'max' (max projection, source dtype)
+        channel: Zero-based channel index, or None for every page
+        frames: Optional slice of frames to include
+
+    Returns:
+        The projected frame, or None if no frames were selected
+    """
+    if method not in ("mean", "max"):
+        raise ValueError(f"Unknown projection method: {method}")
+
+    accumulator = None
+    frame_count = 0
+    for frame in iter_tiff_frames(image_path, channel=channel, frames=frames):
+        if accumulator is None:
+            accumulator = frame.astype(np.float64 if method == "mean" else frame.dtype)
+        elif method == "mean":
+            accumulator += frame
+        else:
+            np.maximum(accumulator, frame, out=accumulator)
+        frame_count += 1
+
+    if accumulator is None:
+        return None
+    if method == "mean":
+        accumulator /= frame_count
+    return accumulator
+
+
+def _load_image_array(
+    image_path: str, frame_projection: str | None = None, report_errors: bool = True
+) -> np.ndarray | None:
+    """
+    Load image from path into a numpy array.
+
+    Uncompressed TIFFs are returned as read-only memory maps (see
+    `_read_tiff_page`); callers must copy before writing into the array.
+    By default only the first page of a TIFF is used; pass `frame_projection`
+    ('mean' or 'max') to stream the whole stack through `project_tiff_frames`.
+    Errors are logged, and also shown in the app if `report_errors`.
+    """
     ext = os.path.splitext(image_path)[1].lower()
     if ext in [".tif", ".tiff"]:
         try:
+            if frame_projection is not None:
+                image = project_tiff_frames(image_path, method=frame_projection)
+                if image is None:
+                    _report_error(f"TIFF file has no pages: {image_path}", report_errors)
+                return image
             with tifffile.TiffFile(image_path) as tif:
                 if len(tif.pages) == 0:
-                    st.error(f"TIFF file has no pages: {image_path}")
+                    _report_error(f"TIFF file has no pages: {image_path}", report_errors)
                     return None
-                return tif.pages[0].asarray()
+                return _read_tiff_page(tif)
         except Exception as e:
-            logger.error(f"Failed to load TIFF: {image_path} ({e})")
-            st.error(f"Failed to load TIFF: {image_path} ({e})")
+            _report_error(f"Failed to load TIFF: {image_path} ({e})", report_errors)
             return None
     else:
         try:
             image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
             if image is None:
-                logger.info(f"OpenCV failed to load image, trying PIL: {image_path}")
+                logger.info("OpenCV failed to load image, trying PIL: %s", image_path)
                 pil_image = Image.open(image_path)
                 image = np.array(pil_image)
             return image
         except Exception as e:
-            logger.error(f"Error loading image: {image_path} ({e})")
-            st.error(f"Error loading image: {image_path} ({e})")
+            _report_error(f"Error loading image: {image_path} ({e})", report_errors)
             return None
 
 
-def _normalize_and_prepare_image(
-    image: np.ndarray, unique_id: str, settings: dict
+def _decode_image_buffer(
+    data: bytes, filename: str, report_errors: bool = True
 ) -> np.ndarray | None:
-    """Normalize the image and prepare it for display."""
-    logger.info(
-        f"Loaded image: shape={image.shape}, dtype={image.dtype}, range={np.min(image)}-{np.max(image)}"
-    )
-    if len(image.shape) == 3 and image.shape[2] == 3:  # BGR to RGB
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    """
+    Decode an encoded image held in memory, without writing it to disk.
+
+    Mirrors `_load_image_array`: TIFFs go through tifffile (uncompressed pages
+    become zero-copy views of `data`), everything else through OpenCV with a
+    PIL fallback.
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in [".tif", ".tiff"]:
+        try:
+            with tifffile.TiffFile(io.BytesIO(data)) as tif:
+                if len(tif.pages) == 0:
+                    _report_error(f"TIFF file has no pages: {filename}", report_errors)
+                    return None
+                return _read_tiff_page(tif, buffer=data)
+        except Exception as e:
+            _report_error(f"Failed to decode TIFF: {filename} ({e})", report_errors)
+            return None
+    else:
+        try:
+            image = cv2.imdecode(
+                np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED
+            )
+            if image is None:
+                logger.info("OpenCV failed to decode image, trying PIL: %s", filename)
+                with Image.open(io.BytesIO(data)) as pil_image:
+                    image = np.array(pil_image)
+            return image
+        except Exception as e:
+            _report_error(f"Error decoding image: {filename} ({e})", report_errors)
+            return None
 
-    bit_depth = _get_effective_bit_depth(image)
-    st.session_state[f"bit_depth_{unique_id}"] = bit_depth
 
+def _normalize_and_prepare_image(
+    pipeline: "ImagePipeline", settings: dict
+) -> np.ndarray | None:
+    """Normalize the image and prepare it for display."""
     try:
-        image = normalize_to_uint8(
-            image,
-            autoscale=settings["autoscale"],
-            invert=settings["invert"],
-            normalize=settings["normalize"],
-            saturated_pixels=settings["saturated_pixels"],
-            equalize_histogram=settings["equalize_histogram"],
-        )
-        if image.ndim == 2:  # Grayscale to RGB
-            image = np.stack([image] * 3, axis=-1)
-        elif image.shape[-1] == 1:  # Single channel to RGB
-            image = np.repeat(image, 3, axis=-1)
-        return image
+        return pipeline.display_image(settings)
     except Exception as e:
         logger.error(f"Error normalizing image: {e}")
         st.error(f"Error normalizing image: {e}")
         return None
 
 
-def _process_image_from_path(
-    image_path: str, unique_id: str, settings: dict
-) -> tuple[np.ndarray | None, str | None]:
-    """Process an image loaded from a file path."""
-    if not os.path.exists(image_path):
-        st.error(f"File not found: {image_path}")
-        return None, None
-
-    image_array = _load_image_array(image_path)
-    if image_array is None:
-        return None, None
-
-    processed_image = _normalize_and_prepare_image(image_array, unique_id, settings)
-    if processed_image is None:
-        return None, None
-
-    return processed_image, image_path
-
-
-def _process_image_from_buffer(
-    uploaded_file, unique_id: str, settings: dict
-) -> tuple[np.ndarray | None, str | None]:
-    """Process an image loaded from an uploaded file buffer."""
-    temp_path = ""
+def _decode_uploaded_buffer(
+    uploaded_file, report_errors: bool = True
+) -> np.ndarray | None:
+    """Decode an image directly from an uploaded file buffer."""
     try:
-        with tempfile.NamedTemporaryFile(
-            delete=False, suffix=os.path.splitext(uploaded_file.name)[1]
-        ) as temp_file:
-            temp_file.write(uploaded_file.getvalue())
-            temp_path = temp_file.name
+        return _decode_image_buffer(
+            uploaded_file.getvalue(), uploaded_file.name, report_errors=report_errors
+        )
+    except Exception as e:
+        _report_error(f"Error processing uploaded file buffer: {e}", report_errors)
+        return None
 
-        image_array = _load_image_array(temp_path)
-        if image_array is None:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-            return None, None
 
-        processed_image = _normalize_and_prepare_image(image_array, unique_id, settings)
-        if processed_image is None:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-            return None, None
-
-        return processed_image, temp_path
-    except Exception as e:
-        logger.error(f"Error processing uploaded file buffer: {e}")
-        st.error(f"Error processing uploaded file buffer: {e}")
-        if temp_path and os.path.exists(temp_path):
-            os.remove(temp_path)
-        return None, None
+def _report_error(message: str, report_errors: bool = True) -> None:
+    """Log an error and, if `report_errors`, also show it in the app."""
+    logger.error(message)
+    if report_errors:
+        st.error(message)
 
 
 def extract_roi_image(
@@ -592,6 +1495,8 @@ def get_image_session_keys(idx, image_file=None):
         "roi_rotation": f"roi_rotation_{unique_id}",
         # Add key for last ROI rotation
         "last_roi_rotation": f"last_roi_rotation_{unique_id}",
+        # ImageProcessor reused across analyses, so unchanged stages are kept
+        "image_processor": f"image_processor_{unique_id}",
     }
 
 
@@ -608,20 +1513,90 @@ def find_best_two_line_pairs(dark_bar_starts):
     if len(widths) < 2:
         return [], 0.0  # Not enough pairs
     # Find the two widths that are closest to each other
-    min_diff = float("inf")
-    best_indices = (0, 1)
-    for i in range(len(widths)):
-        for j in range(i + 1, len(widths)):
-            diff = abs(widths[i] - widths[j])
-            if diff < min_diff:
-                min_diff = diff
-                best_indices = (i, j)
+    first, second = _closest_width_pairs(np.array([widths], dtype=np.float64))[0]
     # Get the best two pairs and their average width
-    best_pairs = [pairs[best_indices[0]], pairs[best_indices[1]]]
-    avg_width = (widths[best_indices[0]] + widths[best_indices[1]]) / 2
+    best_pairs = [pairs[first], pairs[second]]
+    avg_width = (widths[first] + widths[second]) / 2
     return best_pairs, avg_width
 
 
+def find_best_two_line_pairs_batch(boundary_sets):
+    """
+    `find_best_two_line_pairs` for many sets of dark bar starts at once, e.g.
+    one per ROI row or one per threshold.
+
+    Args:
+        boundary_sets: Sequence of dark bar start lists of any lengths, or a 2D
+            array with one set per row, padded at the end with NaN
+
+    Returns:
+        (pair_indices, avg_widths): row k of `pair_indices` holds the indices i
+        of the two selected pairs (starts[i], starts[i + 1]) of set k, or -1 if
+        the set has fewer than three starts; `avg_widths[k]` is their average
+        width, or 0.0.
+    """
+    if isinstance(boundary_sets, np.ndarray) and boundary_sets.ndim == 2:
+        starts = boundary_sets.astype(np.float64)
+    else:
+        longest = max((len(b) for b in boundary_sets), default=0)
+        starts = np.full((len(boundary_sets), longest), np.nan)
+        for k, boundaries in enumerate(boundary_sets):
+            starts[k, : len(boundaries)] = boundaries
+    widths = np.diff(starts, axis=1)
+    pair_indices = _closest_width_pairs(widths)
+    found = pair_indices[:, 0] >= 0
+    avg_widths = np.zeros(len(widths))
+    if found.any():
+        selected = np.take_along_axis(widths[found], pair_indices[found], axis=1)
+        avg_widths[found] = selected.sum(axis=1) / 2
+    return pair_indices, avg_widths
+
+
+def _closest_width_pairs(widths: np.ndarray) -> np.ndarray:
+    """
+    Indices (i, j), i < j, of the two closest widths in each row of `widths`.
+
+    After sorting a row, the closest two widths are neighbours, so this takes
+    O(n log n) instead of comparing all pairs. Ties go to the smallest (i, j),
+    as in a double loop over i < j. NaN marks padding; rows with fewer than
+    two widths get (-1, -1).
+    """
+    rows, count = widths.shape
+    result = np.full((rows, 2), -1, dtype=np.intp)
+    if count < 2:
+        return result
+    order = np.argsort(widths, axis=1, kind="stable")  # NaN sorts last
+    gaps = np.diff(np.take_along_axis(widths, order, axis=1), axis=1)
+    gaps[np.isnan(gaps)] = np.inf
+    best_gap = gaps.min(axis=1, keepdims=True)
+    low = np.minimum(order[:, :-1], order[:, 1:])
+    high = np.maximum(order[:, :-1], order[:, 1:])
+    # Lexicographic (low, high) rank of every neighbour pair at the best gap
+    rank = np.where(gaps == best_gap, low * count + high, count * count)
+    best = rank.argmin(axis=1)
+    found = np.isfinite(best_gap[:, 0])
+    result[found, 0] = low[found, best[found]]
+    result[found, 1] = high[found, best[found]]
+    return result
+
+
+def _michelson_contrast(profiles):
+    """
+    Michelson contrast (max - min) / (max + min) along the last axis.
+
+    Computed in float, so uint8 profiles cannot overflow. NaN marks padding of
+    shorter profiles in a 2D array; all-black profiles have contrast 0.
+    """
+    values = np.asarray(profiles, dtype=np.float64)
+    high = np.nanmax(values, axis=-1)
+    low = np.nanmin(values, axis=-1)
+    total = high + low
+    contrast = np.divide(
+        high - low, total, out=np.zeros_like(total), where=total > 0
+    )
+    return float(contrast) if contrast.ndim == 0 else contrast
+
+
 # --- Core Classes ---
 
 
@@ -647,9 +1622,8 @@ def detect_significant_transitions(profile):
     sign_changes = np.where(np.diff(np.sign(derivative)) != 0)[0] + 1
     all_transitions = sign_changes.tolist()
     # Determine transition type: 1 for positive slope, -1 for negative slope
-    transition_types = [
-        1 if derivative[i - 1] < derivative[i] else -1 for i in sign_changes
-    ]
+    rising = derivative[sign_changes - 1] < derivative[sign_changes]
+    transition_types = np.where(rising, 1, -1).tolist()
     return all_transitions, transition_types, derivative
 
 
@@ -667,26 +1641,15 @@ def extract_alternating_patterns(transitions, transition_types):
     if len(transitions) <= 2:
         return transitions, transition_types
 
-    # Try to identify proper line pair transitions by looking for alternating patterns
-    proper_transitions = []
-    proper_types = []
-
-    start_idx = 1 if transition_types and transition_types[0] == 1 else 0
-    # Extract transitions by expected pattern
-    i = start_idx
-    while i < len(transitions) - 1:
-        # Check for a light-to-dark followed by dark-to-light pattern
-        if (
-            i + 1 < len(transition_types)
-            and transition_types[i] == -1
-            and transition_types[i + 1] == 1
-        ):
-            proper_transitions.extend([transitions[i], transitions[i + 1]])
-            proper_types.extend([transition_types[i], transition_types[i + 1]])
-            i += 2
-        else:
-            # Skip this transition if it doesn't fit the pattern
-            i += 1
+    # Try to identify proper line pair transitions by looking for alternating
+    # patterns: a light-to-dark transition followed by a dark-to-light one.
+    # Two such pairs can never overlap, so every occurrence is kept.
+    count = min(len(transitions), len(transition_types))
+    types = np.asarray(transition_types[:count])
+    pair_starts = np.flatnonzero((types[:-1] == -1) & (types[1:] == 1))
+    pair_indices = np.stack([pair_starts, pair_starts + 1], axis=1).ravel()
+    proper_transitions = np.asarray(transitions[:count])[pair_indices].tolist()
+    proper_types = [-1, 1] * len(pair_starts)
 
     # If we found proper transitions, use them
     if len(proper_transitions) >= 2:
@@ -759,6 +1722,22 @@ def find_line_pair_boundaries_derivative(profile):
     return dark_bar_starts, derivative, dark_bar_types
 
 
+def _window_means(profile: np.ndarray, window: int) -> np.ndarray:
+    """
+    Means of every `window`-long run of `profile`, equal to `np.mean` of each slice.
+
+    Integer profiles use prefix sums, whose differences are exact. Float sums
+    depend on the summation order, so those are reduced window by window.
+    """
+    if len(profile) < window:
+        return np.empty(0)
+    if profile.dtype.kind in "biu":
+        sums = np.concatenate(([0], np.cumsum(profile, dtype=np.int64)))
+        return (sums[window:] - sums[:-window]).astype(np.float64) / window
+    windows = np.lib.stride_tricks.sliding_window_view(profile, window)
+    return windows.mean(axis=1)
+
+
 def find_line_pair_boundaries_windowed(profile, window=5):
     """
     Find line pair boundaries using sign changes in a windowed mean difference.
@@ -768,16 +1747,16 @@ def find_line_pair_boundaries_windowed(profile, window=5):
     """
     profile = np.asarray(profile)
     pseudo_derivative = np.zeros_like(profile, dtype=float)
-    edges = []
-    transition_types = []
-    for i in range(window, len(profile) - window):
-        left = np.mean(profile[i - window : i])
-        right = np.mean(profile[i : i + window])
-        diff = right - left
-        pseudo_derivative[i] = diff
-        if i > window and np.sign(pseudo_derivative[i - 1]) != np.sign(diff):
-            edges.append(i)
-            transition_types.append(1 if diff > 0 else -1)
+    # Mean of profile[j : j + window] for every j
+    means = _window_means(profile, window)
+    # diff at i is the mean of the window starting at i minus the one ending there
+    count = max(len(profile) - 2 * window, 0)
+    diffs = means[window : window + count] - means[:count]
+    pseudo_derivative[window : window + count] = diffs
+    signs = np.sign(diffs)
+    changes = np.flatnonzero(signs[1:] != signs[:-1]) + 1
+    edges = (changes + window).tolist()
+    transition_types = np.where(diffs[changes] > 0, 1, -1).tolist()
     pattern_transitions, pattern_types = extract_alternating_patterns(
         edges, transition_types
     )
@@ -795,6 +1774,125 @@ def find_line_pair_boundaries_windowed(profile, window=5):
     return dark_bar_starts, pseudo_derivative, dark_bar_types
 
 
+def estimate_line_pair_period(profile, min_period=4.0) -> float:
+    """
+    Estimate the line pair period of a profile from its autocorrelation.
+
+    The autocorrelation is computed with a zero-padded rFFT in O(n log n) and
+    uses every sample, so unlike the edge detectors it needs no threshold and
+    tolerates noise and low contrast. The period is the first strong peak after
+    the central lobe, refined to sub-pixel precision with a parabola through
+    the peak and its two neighbours. At least two periods must fit in the
+    profile.
+
+    Args:
+        profile: The intensity profile array
+        min_period: Shortest period to consider, in pixels
+
+    Returns:
+        The period in pixels, or 0.0 if the profile shows none.
+    """
+    values = np.asarray(profile, dtype=np.float64)
+    if values.size < 2 * min_period:
+        return 0.0
+    values = values - values.mean()
+    if not np.any(values):
+        return 0.0
+    # Padding to twice the length keeps the circular correlation from wrapping
+    size = 1 << (2 * values.size - 1).bit_length()
+    spectrum = np.fft.rfft(values, size)
+    autocorrelation = np.fft.irfft(spectrum.real**2 + spectrum.imag**2, size)
+    lags = np.arange(values.size // 2 + 1)
+    # Unbiased estimate, so later peaks are not damped by fewer overlapping samples
+    autocorrelation = autocorrelation[: lags.size] / (values.size - lags)
+    autocorrelation /= autocorrelation[0]
+
+    # Local minima and maxima; the central lobe ends at the first minimum, which
+    # need not be negative when the bars are darker on average than the margins
+    middle = autocorrelation[1:-1]
+    rising = autocorrelation[2:] > middle
+    falling = autocorrelation[:-2] >= middle
+    minima = np.flatnonzero(falling & rising) + 1
+    peaks = np.flatnonzero(~falling & ~rising) + 1
+    if len(minima) == 0:
+        return 0.0
+    peaks = peaks[(peaks > minima[0]) & (peaks >= min_period)]
+    # A period's peak rises clearly above the lowest point since the lobe ended
+    valley = np.minimum.accumulate(autocorrelation[minima[0] :])
+    peaks = peaks[autocorrelation[peaks] - valley[peaks - minima[0]] >= 0.1]
+    if len(peaks) == 0:
+        return 0.0
+    # The strongest peak, unless it is a multiple of a nearly as strong fundamental
+    peak = peaks[np.argmax(autocorrelation[peaks])]
+    for divisor in (3, 2):
+        near = peaks[np.abs(peaks - peak / divisor) <= 0.15 * peak / divisor]
+        near = near[autocorrelation[near] >= 0.5 * autocorrelation[peak]]
+        if len(near):
+            peak = near[np.argmax(autocorrelation[near])]
+            break
+    before, top, after = autocorrelation[peak - 1 : peak + 2]
+    curvature = before - 2 * top + after
+    offset = 0.5 * (before - after) / curvature if curvature < 0 else 0.0
+    return float(peak + offset)
+
+
+def find_line_pair_boundaries_fft(profile, period=None):
+    """
+    Find line pair boundaries from the profile's fundamental spatial frequency.
+
+    The phase of the profile's Fourier component at the line pair period
+    places the dark bar starts; starts where the profile is not darker than
+    the half periods around them (e.g. background beyond the bars) are dropped.
+
+    Args:
+        profile: The intensity profile array
+        period: Line pair period in pixels; estimated with
+            `estimate_line_pair_period` if None
+
+    Returns:
+        (dark_bar_starts, fundamental, transition_types)
+    Only -1 (light-to-dark) transitions are returned as boundaries.
+    """
+    values = np.asarray(profile, dtype=np.float64)
+    if period is None:
+        period = estimate_line_pair_period(values)
+    fundamental = np.zeros_like(values)
+    if period <= 0:
+        logger.warning("No line pair period found in the profile!")
+        return [], fundamental, []
+
+    positions = np.arange(values.size)
+    centered = values - values.mean()
+    phasor = np.exp(-2j * np.pi * positions / period)
+    coefficient = centered @ phasor
+    phase = np.angle(coefficient)
+    fundamental = 2 * np.abs(coefficient) / values.size * np.cos(
+        2 * np.pi * positions / period + phase
+    )
+
+    # Dark bars are centered on the fundamental's minima and half a period wide;
+    # their first pixel's center lies half a pixel after the edge
+    first_start = (((np.pi - phase) / (2 * np.pi) - 0.25) * period + 0.5) % period
+    starts = np.arange(first_start, values.size - period / 2, period)
+    half = period / 2
+    strengths = np.zeros(len(starts))
+    for k, start in enumerate(starts):
+        dark = values[int(round(start)) : int(round(start + half))]
+        light = np.concatenate(
+            (
+                values[max(int(round(start - half)), 0) : int(round(start))],
+                values[int(round(start + half)) : int(round(start + period))],
+            )
+        )
+        if dark.size and light.size:
+            strengths[k] = light.mean() - dark.mean()
+    if len(starts) == 0 or strengths.max() <= 0:
+        return [], fundamental, []
+    keep = strengths >= 0.5 * strengths.max()
+    dark_bar_starts = np.rint(starts[keep]).astype(int).tolist()
+    return dark_bar_starts, fundamental, [-1] * len(dark_bar_starts)
+
+
 def find_line_pair_boundaries_threshold(profile, threshold):
     """
     Find line pair boundaries by locating where the profile crosses a threshold value.
@@ -816,17 +1914,14 @@ def find_line_pair_boundaries_threshold(profile, threshold):
     # Create a binary mask where True is above threshold
     above_threshold = profile_array > threshold
 
-    dark_bar_starts = [
-        i
-        for i in range(1, len(above_threshold))
-        if above_threshold[i - 1] == True and above_threshold[i] == False
-    ]
+    # Positions whose left neighbour is above the threshold and which are not
+    # themselves above it, i.e. the first pixel of each dark bar
+    falling = above_threshold[:-1] & ~above_threshold[1:]
+    dark_bar_starts = (np.flatnonzero(falling) + 1).tolist()
     # Create corresponding transition types (all -1 for light-to-dark)
     transition_types = [-1] * len(dark_bar_starts)
 
-    logger.info(
-        f"Profile range: {np.min(profile_array)} to {np.max(profile_array)}, threshold: {threshold}"
-    )
+    _log_debug_statistics("Threshold profile", profile_array)
     if len(dark_bar_starts) <= 0:
         logger.warning(f"No dark bar starts found with threshold {threshold}!")
 
@@ -836,6 +1931,71 @@ def find_line_pair_boundaries_threshold(profile, threshold):
     return dark_bar_starts, thresholded_profile, transition_types
 
 
+def sweep_thresholds(profile) -> tuple[int | None, np.ndarray]:
+    """
+    Score every threshold 0-255 for `find_line_pair_boundaries_threshold` in
+    one vectorized pass over the profile.
+
+    A threshold scores well when it finds the three dark bar starts of an
+    element (fewer give no measurement, more are noise), when the two selected
+    line pairs have similar widths, and when the profile above and below it
+    differs strongly (Michelson contrast of the two means). The score is the
+    product of the three, each in [0, 1].
+
+    Args:
+        profile: The intensity profile array
+
+    Returns:
+        (best_threshold, scores): the middle of the thresholds sharing the best
+        score, or None if no threshold finds two line pairs, and the score of
+        each threshold 0-255.
+    """
+    profile_array = np.asarray(profile, dtype=np.float64)
+    thresholds = np.arange(256)
+    scores = np.zeros(len(thresholds))
+    if profile_array.size < 2:
+        return None, scores
+
+    # Same falling crossings as the single-threshold path, one row per threshold
+    above = profile_array[None, :] > thresholds[:, None]
+    falling = above[:, :-1] & ~above[:, 1:]
+    counts = falling.sum(axis=1)
+    rows, cols = np.nonzero(falling)
+    slots = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    starts = np.full((len(thresholds), counts.max()), np.nan)
+    starts[rows, slots] = cols + 1
+
+    pair_indices, _ = find_best_two_line_pairs_batch(starts)
+    found = pair_indices[:, 0] >= 0
+    consistency = np.zeros(len(thresholds))
+    if found.any():
+        widths = np.take_along_axis(
+            np.diff(starts[found], axis=1), pair_indices[found], axis=1
+        )
+        consistency[found] = 1 - np.abs(widths[:, 0] - widths[:, 1]) / widths.sum(
+            axis=1
+        )
+    count_score = np.where(counts >= 3, 3 / np.maximum(counts, 1), 0.0)
+
+    # Means below and above each threshold from one sort and a cumulative sum
+    ordered = np.sort(profile_array)
+    sums = np.concatenate(([0.0], np.cumsum(ordered)))
+    below = np.searchsorted(ordered, thresholds, side="right")
+    above_count = ordered.size - below
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_below = sums[below] / below
+        mean_above = (sums[-1] - sums[below]) / above_count
+        contrast = (mean_above - mean_below) / (mean_above + mean_below)
+    contrast = np.nan_to_num(contrast, nan=0.0, posinf=0.0, neginf=0.0)
+
+    scores = count_score * consistency * contrast
+    best_score = scores.max()
+    if best_score <= 0:
+        return None, scores
+    best = np.flatnonzero(scores == best_score)
+    return int(thresholds[best[len(best) // 2]]), scores
+
+
 class RoiManager:
     """
     Class for managing Regions of Interest (ROIs) in images.
@@ -1263,6 +2423,8 @@ class ProfileVisualizer:
             method_str = "Windowed Step (Robust)"
         elif edge_method == "threshold":
             method_str = "Threshold-based"
+        elif edge_method == "fft":
+            method_str = "Spatial Frequency (FFT)"
         else:
             method_str = "Original"
 
@@ -1408,8 +2570,253 @@ class ProfileVisualizer:
             logger.warning("No boundaries detected for visualization")
 
 
+def _downsample_by_half(image: np.ndarray) -> np.ndarray:
+    """Halve an image in both dimensions by area averaging (one pyramid level)."""
+    height, width = image.shape[:2]
+    return cv2.resize(
+        image, ((width + 1) // 2, (height + 1) // 2), interpolation=cv2.INTER_AREA
+    )
+
+
+def _processing_params_key(params: dict) -> tuple:
+    """Hashable key for a set of normalize_to_uint8 parameters, lean mode included."""
+    return tuple(sorted({"lean": MEMORY_LEAN, **params}.items()))
+
+
+class ImagePipeline:
+    """
+    One decoded image and everything derived from it, each computed once.
+
+    The display path and `ImageProcessor` share a pipeline, so an analysis
+    reuses the decode, the RGB/grayscale conversions and the normalization that
+    were already done to show the image. Derived arrays are stored in the
+    shared `DecodedImageCache` under the image's content hash (or on the
+    pipeline itself when no hash is given), keyed by the processing parameters.
+    """
+
+    def __init__(
+        self,
+        raw: np.ndarray,
+        content_hash: str | None = None,
+        cache: DecodedImageCache | None = None,
+        source=None,
+    ):
+        self.raw = raw  # As decoded: BGR for 3-channel images
+        self.content_hash = content_hash
+        self.source = source  # Path or upload the image came from, for metadata
+        self._cache = cache if cache is not None else _image_cache
+        self._local: dict[tuple, Any] = {}
+
+    def _memoized(self, key: tuple, compute):
+        """Return the value stored under `key`, computing and storing it if missing."""
+        if self.content_hash is None:
+            if key not in self._local:
+                self._local[key] = compute()
+            return self._local[key]
+        cache_key = (self.content_hash, *key)
+        value = self._cache.get(cache_key)
+        if value is None:
+            value = compute()
+            self._cache.put(cache_key, value)
+        return value
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """The raw image with 3-channel BGR data converted to RGB."""
+
+        def compute():
+            image = self.raw
+            if len(image.shape) == 3 and image.shape[2] == 3:  # BGR to RGB
+                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            return image
+
+        return self._memoized(("rgb",), compute)
+
+    @property
+    def grayscale(self) -> np.ndarray:
+        """Unprocessed grayscale version of the image."""
+
+        def compute():
+            image = self.rgb
+            if len(image.shape) > 2:
+                return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+            return image
+
+        return self._memoized(("grayscale",), compute)
+
+    def grayscale_crop(self, roi: tuple[int, int, int, int]) -> np.ndarray:
+        """
+        Equal to `grayscale[y:y+h, x:x+w]`, but computed from the raw crop alone.
+
+        Only the ROI is colour-converted (and, for memory-mapped images, read
+        from disk), so this is cheap even on frames that were never converted.
+        """
+        x, y, width, height = roi
+        image = self.raw[y : y + height, x : x + width]
+        if len(image.shape) == 3 and image.shape[2] == 3:  # BGR to RGB
+            image = cv2.cvtColor(np.ascontiguousarray(image), cv2.COLOR_BGR2RGB)
+        if len(image.shape) > 2:
+            image = cv2.cvtColor(np.ascontiguousarray(image), cv2.COLOR_RGB2GRAY)
+        return image
+
+    @property
+    def bit_depth(self) -> int:
+        """
+        Digitization bit depth of the raw image.
+
+        Taken from the source file's metadata when it records it, otherwise
+        estimated from the pixel maximum; either way only once per image.
+        """
+
+        def compute():
+            bit_depth = None
+            if self.source is not None and self.raw.dtype.kind in "ui":
+                bit_depth = _read_bit_depth_metadata(self.source)
+            return bit_depth or _get_effective_bit_depth(self.raw, self.stats)
+
+        return self._memoized(("bit_depth",), compute)
+
+    @property
+    def stats(self) -> ImageStats:
+        """Intensity statistics of the (RGB) image."""
+
+        def compute():
+            stats = ImageStats(self.rgb)
+            logger.info(
+                "Loaded image: shape=%s, dtype=%s, range=%s-%s",
+                stats.shape,
+                stats.dtype,
+                stats.min,
+                stats.max,
+            )
+            return stats
+
+        return self._memoized(("stats",), compute)
+
+    def roi_stats(self, params: dict, roi: tuple[int, int, int, int]) -> RoiStats | None:
+        """Statistics of `roi` in the display image for `params`, or None if empty."""
+
+        def compute():
+            roi_image = extract_roi_image(self.display_image(params), roi)
+            if roi_image is None or roi_image.size == 0:
+                return None
+            return RoiStats(roi_image)
+
+        return self._memoized(
+            ("roi_stats", tuple(roi), *_processing_params_key(params)), compute
+        )
+
+    def bit_depth_for(self, params: dict) -> int | None:
+        """The bit depth if `params` select bit-depth scaling, else None."""
+        if params.get("autoscale", True) or params.get("normalize", False):
+            return None
+        return self.bit_depth
+
+    def normalized(self, params: dict) -> np.ndarray:
+        """The image normalized to uint8 with `normalize_to_uint8(**params)`."""
+        def compute():
+            # Statistics are not used by scikit-image's equalization
+            skimage_equalization = params.get("equalize_histogram") and (
+                params.get("equalization_method") == "skimage"
+            )
+            stats = None if skimage_equalization else self.stats
+            normalized = normalize_to_uint8(
+                self.rgb, bit_depth=self.bit_depth_for(params), stats=stats, **params
+            )
+            _log_debug_statistics("Normalized image", normalized)
+            return normalized
+
+        return self._memoized(
+            ("normalized", *_processing_params_key(params)), compute
+        )
+
+    def normalized_grayscale(self, params: dict) -> np.ndarray:
+        """Grayscale version of the normalized image, as used for analysis."""
+
+        def compute():
+            image = self.normalized(params)
+            if len(image.shape) > 2:
+                return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+            return image
+
+        return self._memoized(
+            ("normalized_grayscale", *_processing_params_key(params)), compute
+        )
+
+    def display_image(self, params: dict) -> np.ndarray:
+        """The normalized image as 3-channel RGB, ready for display."""
+
+        def compute():
+            image = self.normalized(params)
+            if image.ndim == 2:  # Grayscale to RGB
+                return np.stack([image] * 3, axis=-1)
+            if image.shape[-1] == 1:  # Single channel to RGB
+                return np.repeat(image, 3, axis=-1)
+            return image
+
+        return self._memoized(("display", *_processing_params_key(params)), compute)
+
+    def display_level(
+        self, params: dict, max_width: int = DISPLAY_MAX_WIDTH
+    ) -> tuple[np.ndarray, tuple[float, float]]:
+        """
+        Return the first level of the display pyramid that fits `max_width`.
+
+        Level 0 is the full-resolution display image; each further level halves
+        the previous one (area-averaged). Levels are built only as far as needed
+        and cached like the other derived arrays.
+
+        Args:
+            params: Processing parameters of the display image
+            max_width: Maximum width in pixels of the returned level
+
+        Returns:
+            (level_image, (scale_x, scale_y)): the level and the factors that map
+            its pixel coordinates back to full-resolution pixels
+        """
+        params_key = _processing_params_key(params)
+        full_image = self.display_image(params)
+        level_image = full_image
+        level = 0
+        while level_image.shape[1] > max_width and min(level_image.shape[:2]) > 1:
+            level += 1
+            level_image = self._memoized(
+                ("display_pyramid", level, *params_key),
+                functools.partial(_downsample_by_half, level_image),
+            )
+        scale = (
+            full_image.shape[1] / level_image.shape[1],
+            full_image.shape[0] / level_image.shape[0],
+        )
+        return level_image, scale
+
+
+# ImageProcessor stages in dependency order. Grayscale conversion is part of
+# "decode" (the pipeline provides both) and rotation is part of "roi".
+PROCESSOR_STAGES = ("decode", "normalize", "roi", "profile", "edges", "metrics")
+
+
 class ImageProcessor:
-    def __init__(self, usaf_target: USAFTarget = None):
+    """
+    Runs the analysis as a chain of stages (see `PROCESSOR_STAGES`).
+
+    `process_and_analyze` remembers the inputs each stage was last computed
+    from and only recomputes a stage when its inputs changed or a stage before
+    it was recomputed, so repeating an analysis with e.g. a new threshold
+    reuses the loaded image, the ROI and the profile.
+    """
+
+    def __init__(self, usaf_target: USAFTarget = None, roi_first: bool = False):
+        """
+        Args:
+            usaf_target: Target geometry used for the line pair calculations
+            roi_first: Crop (and rotate) the raw image before normalizing, so
+                only the ROI is ever processed. The full-frame `image` and
+                `grayscale` are then not built, and normalization statistics
+                (autoscale percentiles, equalization) come from the ROI alone.
+        """
+        self.roi_first = roi_first
+        self.pipeline = None  # Shared ImagePipeline for the loaded image
         self.image = None
         self.original_image = None  # Store the original unprocessed image
         self.grayscale = None
@@ -1417,6 +2824,7 @@ class ImageProcessor:
         self.roi_manager = RoiManager()
         self.roi = None
         self.original_roi = None  # Store the original ROI before processing
+        self._original_roi_stats = None  # (original_roi, its ImageStats)
         self.profile = None
         self.individual_profiles = None
         self.usaf_target = usaf_target or USAFTarget()
@@ -1424,6 +2832,7 @@ class ImageProcessor:
         self.transition_types = None
         self.derivative = None
         self.line_pair_widths = []
+        self.line_pair_period = None  # Sub-pixel period from the "fft" method
 
         self.dark_regions = []
         self.light_regions = []
@@ -1434,10 +2843,45 @@ class ImageProcessor:
             "normalize": False,
             "saturated_pixels": 0.5,
             "equalize_histogram": True,  # Changed default to True
+            "equalization_method": DEFAULT_EQUALIZATION_METHOD,
         }
         self.roi_rotation = (
             0  # Store ROI rotation (0, 1, 2, or 3 for 0°, 90°, 180°, 270°)
         )
+        self._stage_keys: dict[str, tuple] = {}  # Inputs of each up-to-date stage
+        self._metrics = None  # Results of the last analyze_profile
+
+    def _stage_current(self, stage: str, key: tuple) -> bool:
+        """Whether `stage` is up to date and was computed from `key`."""
+        return self._stage_keys.get(stage) == key
+
+    def _stage_done(self, stage: str, key: tuple) -> None:
+        """Record that `stage` was computed from `key`; later stages become dirty."""
+        self._invalidate(stage)
+        self._stage_keys[stage] = key
+
+    def _invalidate(self, stage: str) -> None:
+        """Mark `stage` and every stage after it as dirty."""
+        for name in PROCESSOR_STAGES[PROCESSOR_STAGES.index(stage) :]:
+            self._stage_keys.pop(name, None)
+
+    def _params_key(self) -> tuple:
+        return tuple(sorted(self.processing_params.items()))
+
+    @staticmethod
+    def _source_key(image_source) -> tuple:
+        """Identify an image source, so an unchanged one is not loaded again."""
+        if isinstance(image_source, ImagePipeline):
+            return ("pipeline", image_source.content_hash or id(image_source))
+        if isinstance(image_source, np.ndarray):
+            # The previous array stays referenced by the pipeline, so its id
+            # cannot be reused by a different array
+            return ("array", id(image_source))
+        try:
+            stat = os.stat(image_source)
+        except (OSError, TypeError):
+            return ("path", image_source)
+        return ("path", image_source, stat.st_mtime_ns, stat.st_size)
 
     def load_image(self, image_path: str) -> bool:
         try:
@@ -1452,7 +2896,9 @@ class ImageProcessor:
                             if len(tif.pages) == 0:
                                 logger.error(f"TIFF file has no pages: {image_path}")
                                 return False
-                            self.original_image = tif.pages[0].asarray()
+                            # Memory-mapped when uncompressed, so select_roi
+                            # only reads the ROI rows from disk
+                            self.original_image = _read_tiff_page(tif)
                     except Exception as e:
                         logger.error(f"Failed to load TIFF: {image_path} ({e})")
                         return False
@@ -1461,7 +2907,7 @@ class ImageProcessor:
                     if self.original_image is None:
                         # If OpenCV fails, try PIL
                         logger.info(
-                            f"OpenCV failed to load image, trying PIL: {image_path}"
+                            "OpenCV failed to load image, trying PIL: %s", image_path
                         )
                         pil_image = Image.open(image_path)
                         self.original_image = np.array(pil_image)
@@ -1470,27 +2916,9 @@ class ImageProcessor:
                     logger.error(f"Failed to load image: {image_path}")
                     return False
 
-                # Convert BGR to RGB if needed (OpenCV loads as BGR)
-                if (
-                    len(self.original_image.shape) == 3
-                    and self.original_image.shape[2] == 3
-                ):
-                    self.original_image = cv2.cvtColor(
-                        self.original_image, cv2.COLOR_BGR2RGB
-                    )
-
-                # Create grayscale version of the original image
-                if len(self.original_image.shape) > 2:
-                    self.original_grayscale = cv2.cvtColor(
-                        self.original_image, cv2.COLOR_RGB2GRAY
-                    )
-                else:
-                    self.original_grayscale = self.original_image
-
-                # Create display version with default processing
-                self.apply_processing()
-
-                return True
+                return self.set_pipeline(
+                    ImagePipeline(self.original_image, source=image_path)
+                )
             except Exception as e:
                 logger.error(f"Error loading image: {e}")
                 return False
@@ -1498,27 +2926,73 @@ class ImageProcessor:
             logger.error(f"Error loading image: {e}")
             return False
 
-    def apply_processing(self):
-        """Apply current processing parameters to the original image"""
+    def set_image(self, image: np.ndarray) -> bool:
+        """
+        Use an already decoded image (as returned by the loaders, i.e. BGR for
+        3-channel images) instead of reading it from disk.
+
+        Args:
+            image: The raw decoded image array
+
+        Returns:
+            bool: True if the image was set and processed, False otherwise
+        """
+        if image is None:
+            logger.error("No image provided")
+            return False
+        return self.set_pipeline(ImagePipeline(image))
+
+    def set_pipeline(self, pipeline: ImagePipeline) -> bool:
+        """
+        Use a shared `ImagePipeline`, reusing its decoded and normalized arrays.
+
+        Args:
+            pipeline: Pipeline of the image to analyze
+
+        Returns:
+            bool: True if the image was set and processed, False otherwise
+        """
         try:
-            # Apply processing to the original image
-            self.image = normalize_to_uint8(
-                self.original_image,
-                autoscale=self.processing_params["autoscale"],
-                invert=self.processing_params["invert"],
-                normalize=self.processing_params["normalize"],
-                saturated_pixels=self.processing_params["saturated_pixels"],
-                equalize_histogram=self.processing_params["equalize_histogram"],
-            )
+            self._invalidate("decode")
+            self.pipeline = pipeline
+            if self.roi_first:
+                # Nothing is processed until an ROI is selected
+                self.original_image = self.original_grayscale = None
+                self.image = self.grayscale = None
+                return True
+            # RGB-converted original and its grayscale version
+            self.original_image = pipeline.rgb
+            self.original_grayscale = pipeline.grayscale
 
-            # Create grayscale version of the processed image
-            if len(self.image.shape) > 2:
-                self.grayscale = cv2.cvtColor(self.image, cv2.COLOR_RGB2GRAY)
-            else:
-                self.grayscale = self.image
+            # Create display version with default processing
+            return self.apply_processing()
+        except Exception as e:
+            logger.error(f"Error setting image: {e}")
+            return False
+
+    @property
+    def original_roi_stats(self) -> ImageStats | None:
+        """`ImageStats` of `original_roi`, computed on first use after each ROI change."""
+        if self.original_roi is None:
+            return None
+        if self._original_roi_stats is None or self._original_roi_stats[0] is not self.original_roi:
+            self._original_roi_stats = (self.original_roi, ImageStats(self.original_roi))
+        return self._original_roi_stats[1]
 
+    def apply_processing(self):
+        """Apply current processing parameters to the original image"""
+        if not self._normalize_frame():
+            return False
+        try:
             # If we have an ROI, reapply processing to it
             if self.original_roi is not None:
+                params = self.processing_params
+                uses_stats = _normalization_uses_stats(
+                    self.original_roi,
+                    params["normalize"],
+                    params["equalize_histogram"],
+                    params["equalization_method"],
+                )
                 self.roi = normalize_to_uint8(
                     self.original_roi,
                     autoscale=self.processing_params["autoscale"],
@@ -1526,6 +3000,9 @@ class ImageProcessor:
                     normalize=self.processing_params["normalize"],
                     saturated_pixels=self.processing_params["saturated_pixels"],
                     equalize_histogram=self.processing_params["equalize_histogram"],
+                    equalization_method=self.processing_params["equalization_method"],
+                    bit_depth=self.pipeline.bit_depth_for(self.processing_params),
+                    stats=self.original_roi_stats if uses_stats else None,
                 )
 
             return True
@@ -1533,12 +3010,33 @@ class ImageProcessor:
             logger.error(f"Error applying processing: {e}")
             return False
 
-    def update_processing_params(self, **kwargs):
-        """Update processing parameters and reapply processing"""
-        for key, value in kwargs.items():
+    def _normalize_frame(self) -> bool:
+        """The "normalize" stage: normalize the full frame (not in ROI-first mode)."""
+        if self.pipeline is None:
+            return False
+        try:
+            if not self.roi_first:
+                # Normalized image and its grayscale version, shared via the pipeline
+                self.image = self.pipeline.normalized(self.processing_params)
+                self.grayscale = self.pipeline.normalized_grayscale(
+                    self.processing_params
+                )
+            self._stage_done("normalize", self._params_key())
+            return True
+        except Exception as e:
+            logger.error(f"Error applying processing: {e}")
+            return False
+
+    def _set_processing_params(self, params: dict) -> None:
+        for key, value in params.items():
             if key in self.processing_params:
                 self.processing_params[key] = value
 
+    def update_processing_params(self, **kwargs):
+        """Update processing parameters and reapply processing if any changed"""
+        self._set_processing_params(kwargs)
+        if self._stage_current("normalize", self._params_key()):
+            return True
         return self.apply_processing()
 
     def set_roi(self, roi_coordinates: tuple[int, int, int, int]) -> bool:
@@ -1551,6 +3049,7 @@ class ImageProcessor:
         Returns:
             bool: True if ROI is valid, False otherwise
         """
+        self._invalidate("roi")
         if not isinstance(roi_coordinates, tuple) or len(roi_coordinates) != 4:
             logger.error(f"Invalid ROI coordinates format: {roi_coordinates}")
             return False
@@ -1560,11 +3059,12 @@ class ImageProcessor:
         point2 = (x + width, y + height)
 
         # Use ROI manager to set and validate coordinates
+        frame = self.pipeline.raw if self.roi_first and self.pipeline else self.grayscale
         valid = self.roi_manager.set_coordinates(point1, point2)
-        valid = valid and self.roi_manager.validate_against_image(self.grayscale)
+        valid = valid and self.roi_manager.validate_against_image(frame)
 
-        if valid:
-            self.select_roi()
+        if valid and self.select_roi() is not None:
+            self._stage_done("roi", (roi_coordinates, self.roi_rotation))
 
         return valid
 
@@ -1584,6 +3084,9 @@ class ImageProcessor:
         Returns:
             Optional[np.ndarray]: The extracted ROI or None
         """
+        self._invalidate("roi")
+        if self.roi_first:
+            return self._select_roi_first()
         if self.grayscale is None or not self.roi_manager.is_valid:
             return None
 
@@ -1596,32 +3099,57 @@ class ImageProcessor:
             if self.roi_rotation > 0:
                 self.original_roi = rotate_image(self.original_roi, self.roi_rotation)
                 self.roi = rotate_image(self.roi, self.roi_rotation)
+            _log_debug_statistics("ROI", self.roi)
 
             return self.roi
         except Exception as e:
             logger.error(f"Error selecting ROI: {e}")
             return None
 
+    def _select_roi_first(self) -> np.ndarray | None:
+        """`select_roi` for ROI-first mode: crop, rotate, then normalize the ROI."""
+        if self.pipeline is None or not self.roi_manager.is_valid:
+            return None
+        try:
+            self.original_roi = self.pipeline.grayscale_crop(self.roi_manager.roi_tuple)
+            if self.roi_rotation > 0:
+                self.original_roi = rotate_image(self.original_roi, self.roi_rotation)
+            self.apply_processing()
+            _log_debug_statistics("ROI", self.roi)
+            return self.roi
+        except Exception as e:
+            logger.error(f"Error selecting ROI: {e}")
+            return None
+
     def get_line_profile(self, use_max=False) -> np.ndarray | None:
+        self._invalidate("profile")
         if self.roi is None:
             return None
         try:
             use_roi = self.roi
             self.individual_profiles = use_roi.copy()
             self.profile = np.max(use_roi, axis=0) if use_max else np.mean(use_roi, axis=0)
+            self._stage_done("profile", (use_max,))
             return self.profile
         except Exception as e:
             logger.error(f"Error getting line profile: {e}")
             return None
 
     def detect_edges(self, edge_method="original"):
+        self._invalidate("edges")
         if self.profile is None:
             logger.error("No profile available for edge detection")
             return False
+        self.line_pair_period = None
         if edge_method == "parallel":
             self.boundaries, self.derivative, self.transition_types = (
                 find_line_pair_boundaries_windowed(self.profile)
             )
+        elif edge_method == "fft":
+            self.line_pair_period = estimate_line_pair_period(self.profile)
+            self.boundaries, self.derivative, self.transition_types = (
+                find_line_pair_boundaries_fft(self.profile, self.line_pair_period)
+            )
         else:
             self.boundaries, self.derivative, self.transition_types = (
                 find_line_pair_boundaries_derivative(self.profile)
@@ -1677,15 +3205,11 @@ class ImageProcessor:
                 )
             else:
                 # Fallback if segmentation didn't work as expected
-                self.contrast = (np.max(self.profile) - np.min(self.profile)) / (
-                    np.max(self.profile) + np.min(self.profile)
-                )
+                self.contrast = _michelson_contrast(self.profile)
         except Exception:
             # Fallback calculation
             if len(self.profile) > 0:
-                self.contrast = (np.max(self.profile) - np.min(self.profile)) / (
-                    np.max(self.profile) + np.min(self.profile)
-                )
+                self.contrast = _michelson_contrast(self.profile)
 
         return self.contrast
 
@@ -1705,20 +3229,27 @@ class ImageProcessor:
             logger.error("No profile available for analysis")
             return {"error": "No profile available for analysis"}
 
+        # The processor is reused between analyses, so start from a clean slate
+        self.line_pair_widths = []
+        self.avg_line_pair_width = 0.0
+        self.dark_regions = []
+        self.light_regions = []
+        self.contrast = 0.0
+
         # Step 1: Detect edges in the profile if not already detected
         # (skip if boundaries are already set, e.g., by threshold detection)
         if self.boundaries is None or len(self.boundaries) == 0:
             self.detect_edges()
-            # Step 2: Use only the best two line pairs
-            self.line_pair_widths = []
 
+        # Step 2: Use only the best two line pairs
         if self.boundaries is not None and len(self.boundaries) >= 3:
             best_pairs, avg_width = find_best_two_line_pairs(self.boundaries)
 
             self.line_pair_widths = [end - start for start, end in best_pairs]
             self.avg_line_pair_width = avg_width
-        else:
-            self.avg_line_pair_width = 0.0
+        if self.line_pair_period:
+            # The whole profile's period is more precise than two pair widths
+            self.avg_line_pair_width = self.line_pair_period
 
         # Step 3: Calculate contrast
         self.calculate_contrast()
@@ -1759,9 +3290,17 @@ class ImageProcessor:
 
         return results
 
+    def _analyze_metrics(self, group: int, element: int) -> dict:
+        """The "metrics" stage: `analyze_profile`, reused while nothing changed."""
+        if not self._stage_current("metrics", (group, element)):
+            self._metrics = self.analyze_profile(group, element)
+            self._stage_done("metrics", (group, element))
+        # Callers add their own keys to the results
+        return dict(self._metrics)
+
     def process_and_analyze(
         self,
-        image_path: str,
+        image_source: ImagePipeline | str | np.ndarray,
         roi: tuple[int, int, int, int],
         group: int,
         element: int,
@@ -1769,28 +3308,43 @@ class ImageProcessor:
         edge_method: str = "original",
         threshold: float = None,
         roi_rotation: int = 0,
+        auto_threshold: bool = False,
         **processing_params,
     ) -> dict:
         """
         Complete pipeline: load image, select ROI, and analyze profile
         Args:
-            image_path: Path to the image file
+            image_source: The image's ImagePipeline, a path to the image file, or an
+                already decoded image array
             roi: Region of interest tuple (x, y, width, height)
             group: USAF group number
             element: USAF group element
             use_max: If True, use max for profile; else mean (defaults to True)
-            edge_method: 'original' or 'parallel', for legend
+            edge_method: 'original', 'parallel' or 'fft', for legend
             threshold: Threshold value for edge detection (if None, use edge_method)
             roi_rotation: Number of 90-degree rotations to apply to the ROI (0-3)
+            auto_threshold: If True, use the best threshold of `sweep_thresholds`
+                instead of `threshold` (which stays the fallback) and add the
+                score of every threshold as "threshold_scores"
             **processing_params: Additional processing parameters (autoscale, invert, etc.)
         Returns:
             Dictionary with analysis results
         """
         if not self._load_and_prepare_image_data(
-            image_path, roi, roi_rotation, processing_params
+            image_source, roi, roi_rotation, processing_params
         ):
             return {"error": "Failed to load or prepare image data."}
 
+        threshold_scores = None
+        if auto_threshold:
+            best_threshold, threshold_scores = sweep_thresholds(self.profile)
+            if best_threshold is not None:
+                threshold = best_threshold
+            else:
+                logger.warning(
+                    f"No threshold finds two line pairs, using threshold {threshold}"
+                )
+
         if threshold is not None:
             results = self._analyze_with_threshold(threshold, group, element)
         else:
@@ -1798,34 +3352,108 @@ class ImageProcessor:
 
         results["threshold"] = threshold if threshold is not None else 0
         results["roi_rotation"] = self.roi_rotation
+        if threshold_scores is not None:
+            results["threshold_scores"] = threshold_scores.tolist()
         return results
 
+    def release_frames(self) -> None:
+        """
+        Drop the references to full-frame arrays, keeping only ROI-sized state.
+
+        A processor kept between analyses would otherwise keep its frames alive
+        after the image cache evicted them. `process_and_analyze` takes the
+        frames from its image source again when the "normalize" or "roi" stage
+        has to rerun; later stages (e.g. a new threshold) do not need them.
+        """
+        self.pipeline = None
+        self.image = self.original_image = None
+        self.grayscale = self.original_grayscale = None
+        # ROIs can be views, which would keep their frame alive
+        for name in ("roi", "original_roi"):
+            array = getattr(self, name)
+            if array is not None and array.base is not None:
+                setattr(self, name, np.array(array))
+        self._original_roi_stats = None
+
     def _load_and_prepare_image_data(
-        self, image_path, roi, roi_rotation, processing_params
+        self, image_source, roi, roi_rotation, processing_params
     ):
-        """Helper to load image, set ROI, and get profile."""
-        if processing_params:
-            self.update_processing_params(**processing_params)
-        self.set_roi_rotation(roi_rotation)
+        """
+        Helper to load image, set ROI, and get profile.
 
-        if not self.load_image(image_path):
-            logger.error(f"Failed to load image: {image_path}")
-            return False
-        if not self.set_roi(roi):
-            logger.error(f"Failed to set ROI: {roi}")
-            return False
-        if self.get_line_profile(use_max=True) is None:
-            logger.error("Failed to get line profile.")
+        Only the stages whose inputs changed since the previous call (and the
+        stages after them) are recomputed.
+        """
+        self.set_roi_rotation(roi_rotation)
+        self._set_processing_params(processing_params)
+        roi_key = (roi, self.roi_rotation)
+        needs_frame = not (
+            self._stage_current("normalize", self._params_key())
+            and self._stage_current("roi", roi_key)
+        )
+        if not self._prepare_frame(image_source, processing_params, needs_frame):
             return False
+        if not self._stage_current("roi", roi_key):
+            if not self.set_roi(roi):
+                logger.error(f"Failed to set ROI: {roi}")
+                return False
+        if not self._stage_current("profile", (True,)):
+            if self.get_line_profile(use_max=True) is None:
+                logger.error("Failed to get line profile.")
+                return False
+
+        return True
+
+    def _prepare_frame(
+        self, image_source, processing_params, needs_frame: bool = True
+    ) -> bool:
+        """
+        Run the "decode" and "normalize" stages unless they are up to date.
+
+        Frames dropped by `release_frames` are taken from `image_source` again
+        if `needs_frame`, without marking the stages after "decode" dirty.
+        """
+        self._set_processing_params(processing_params)
+        source_key = self._source_key(image_source)
+        if not self._stage_current("decode", source_key):
+            if not self._load_source(image_source):
+                return False
+            self._stage_done("decode", source_key)
+        elif needs_frame and self.pipeline is None:
+            # Same source as the stages were computed from, so they stay valid
+            stage_keys = dict(self._stage_keys)
+            if not self._load_source(image_source):
+                return False
+            self._stage_keys = stage_keys
+        if not self._stage_current("normalize", self._params_key()):
+            if not self._normalize_frame():
+                return False
+        return True
 
+    def _load_source(self, image_source) -> bool:
+        """The "decode" stage: use a pipeline, a decoded array or an image path."""
+        if isinstance(image_source, ImagePipeline):
+            if not self.set_pipeline(image_source):
+                logger.error("Failed to set image pipeline")
+                return False
+        elif isinstance(image_source, np.ndarray):
+            if not self.set_image(image_source):
+                logger.error("Failed to set decoded image")
+                return False
+        elif not self.load_image(image_source):
+            logger.error(f"Failed to load image: {image_source}")
+            return False
         return True
 
     def _analyze_with_threshold(self, threshold, group, element):
         """Helper to analyze profile using threshold-based edge detection."""
-        self.boundaries, self.derivative, self.transition_types = (
-            find_line_pair_boundaries_threshold(self.profile, threshold)
-        )
-        results = self.analyze_profile(group, element)
+        if not self._stage_current("edges", ("threshold", threshold)):
+            self.boundaries, self.derivative, self.transition_types = (
+                find_line_pair_boundaries_threshold(self.profile, threshold)
+            )
+            self.line_pair_period = None
+            self._stage_done("edges", ("threshold", threshold))
+        results = self._analyze_metrics(group, element)
         results["profile_type"] = "max"
         results["edge_method"] = "threshold"
         return results
@@ -1834,19 +3462,91 @@ class ImageProcessor:
         """
         Analyze the profile using the specified edge detection method.
         Args:
-            edge_method: The edge detection method to use ('original', 'parallel', etc.)
+            edge_method: The edge detection method to use ('original', 'parallel', 'fft')
             group: USAF group number
             element: USAF group element
         Returns:
             Dictionary with analysis results, including profile type and edge method.
         """
-        self.detect_edges(edge_method=edge_method)
+        if not self._stage_current("edges", ("method", edge_method)):
+            self.detect_edges(edge_method=edge_method)
+            self._stage_done("edges", ("method", edge_method))
 
-        result = self.analyze_profile(group, element)
+        result = self._analyze_metrics(group, element)
         result["profile_type"] = "max"
         result["edge_method"] = edge_method
         return result
 
+    def analyze_elements(
+        self,
+        image_source: ImagePipeline | str | np.ndarray,
+        elements: list[tuple[tuple[int, int, int, int], int, int]],
+        use_max: bool = True,
+        roi_rotation: int = 0,
+        **processing_params,
+    ) -> dict:
+        """
+        Contrast of many target elements of one image, as a contrast transfer curve.
+
+        The image is decoded and normalized once for all elements (the full
+        frame, also in ROI-first mode); the processor's own ROI is left as it
+        was. The contrast is the one `calculate_contrast` falls back to, computed
+        for all profiles at once.
+
+        Args:
+            image_source: The image's ImagePipeline, a path to the image file, or an
+                already decoded image array
+            elements: (roi, group, element) per element, roi as (x, y, width, height)
+            use_max: If True, use max for profiles; else mean (defaults to True)
+            roi_rotation: Number of 90-degree rotations to apply to every ROI (0-3)
+            **processing_params: Additional processing parameters (autoscale, invert, etc.)
+        Returns:
+            Dictionary of lists, one entry per valid element sorted by lp/mm:
+            "roi", "group", "element", "lp_per_mm", "contrast" and "profile"
+        """
+        if not self._prepare_frame(image_source, processing_params):
+            return {"error": "Failed to load or prepare image data."}
+        frame = (
+            self.pipeline.normalized_grayscale(self.processing_params)
+            if self.roi_first
+            else self.grayscale
+        )
+
+        valid, profiles = [], []
+        roi_manager = RoiManager()
+        for roi, group, element in elements:
+            x, y, width, height = roi
+            if not (
+                roi_manager.set_coordinates((x, y), (x + width, y + height))
+                and roi_manager.validate_against_image(frame)
+            ):
+                logger.warning(f"Skipping invalid ROI {roi} of G{group}E{element}")
+                continue
+            roi_image = roi_manager.extract_roi(frame)
+            if roi_rotation % 4:
+                roi_image = rotate_image(roi_image, roi_rotation % 4)
+            valid.append((roi, group, element))
+            profiles.append(
+                np.max(roi_image, axis=0) if use_max else np.mean(roi_image, axis=0)
+            )
+
+        # One NaN-padded array, so the contrasts come from a single reduction
+        padded = np.full((len(profiles), max(map(len, profiles), default=0)), np.nan)
+        for k, profile in enumerate(profiles):
+            padded[k, : len(profile)] = profile
+        contrasts = _michelson_contrast(padded) if profiles else np.empty(0)
+        lp_per_mm = [self.usaf_target.lp_per_mm(g, e) for _, g, e in valid]
+
+        order = np.argsort(lp_per_mm, kind="stable")
+        return {
+            "roi": [valid[k][0] for k in order],
+            "group": [valid[k][1] for k in order],
+            "element": [valid[k][2] for k in order],
+            "lp_per_mm": [float(lp_per_mm[k]) for k in order],
+            "contrast": [float(contrasts[k]) for k in order],
+            "profile": [profiles[k].tolist() for k in order],
+        }
+
 
 # --- Streamlit UI Functions ---
 
@@ -1911,7 +3611,15 @@ def handle_image_selection(
     image_to_display: np.ndarray,
     key: str = "usaf_image",
     rotation: int = 0,
+    display_scale: tuple[float, float] = (1.0, 1.0),
 ) -> bool:
+    """
+    Show the ROI selector and store the selected corners in session state.
+
+    `image_to_display` may be a downsampled pyramid level; `display_scale`
+    (x, y) maps its pixel coordinates back to the full-resolution image, so the
+    stored ROI is always in full-resolution pixels.
+    """
     keys = get_image_session_keys(idx, image_file)
     coordinates_key = keys["coordinates"]
     roi_valid_key = keys["roi_valid"]
@@ -1933,9 +3641,16 @@ def handle_image_selection(
         and coords_component_output.get("y1") is not None
         and coords_component_output.get("y2") is not None
     ):
-        # Get coordinates from the component output
-        point1 = (coords_component_output["x1"], coords_component_output["y1"])
-        point2 = (coords_component_output["x2"], coords_component_output["y2"])
+        # Get coordinates from the component output, in full-resolution pixels
+        scale_x, scale_y = display_scale
+        point1 = (
+            int(round(coords_component_output["x1"] * scale_x)),
+            int(round(coords_component_output["y1"] * scale_y)),
+        )
+        point2 = (
+            int(round(coords_component_output["x2"] * scale_x)),
+            int(round(coords_component_output["y2"] * scale_y)),
+        )
 
         if point1[0] != point2[0] and point1[1] != point2[1]:
             current_coordinates = st.session_state.get(coordinates_key)
@@ -2006,6 +3721,9 @@ def display_analysis_details(results):
         st.latex(
             r"\text{Implied Pixel Size (µm/pixel)} = \text{N/A (requires measurement)}"
         )
+    if threshold_scores := results.get("threshold_scores"):
+        st.markdown(f"**Auto threshold score** (selected: {results.get('threshold')})")
+        st.line_chart(threshold_scores)
 
 
 def analyze_and_display_image(idx, uploaded_file):
@@ -2043,9 +3761,11 @@ def analyze_and_display_image(idx, uploaded_file):
     normalize_key = f"normalize_{unique_id}"
     saturated_pixels_key = f"saturated_pixels_{unique_id}"
     equalize_histogram_key = f"equalize_histogram_{unique_id}"
+    equalization_method_key = f"equalization_method_{unique_id}"
     bit_depth_key = f"bit_depth_{unique_id}"
     magnification_key = f"magnification_{unique_id}"
     threshold_key = f"threshold_{unique_id}"
+    auto_threshold_key = f"auto_threshold_{unique_id}"
     settings_changed_key = f"settings_changed_{unique_id}"
 
     # Initialize settings in session state if they don't exist yet
@@ -2059,8 +3779,12 @@ def analyze_and_display_image(idx, uploaded_file):
         st.session_state[saturated_pixels_key] = 0.5
     if equalize_histogram_key not in st.session_state:
         st.session_state[equalize_histogram_key] = True
+    if equalization_method_key not in st.session_state:
+        st.session_state[equalization_method_key] = DEFAULT_EQUALIZATION_METHOD
     if magnification_key not in st.session_state:
         st.session_state[magnification_key] = default_magnification
+    if auto_threshold_key not in st.session_state:
+        st.session_state[auto_threshold_key] = False
     if settings_changed_key not in st.session_state:
         st.session_state[settings_changed_key] = False
 
@@ -2069,7 +3793,7 @@ def analyze_and_display_image(idx, uploaded_file):
         st.session_state[settings_changed_key] = False
 
     with st.expander(f"📸 Image {idx+1}: {filename}", expanded=(idx == 0)):
-        image, temp_path = _load_and_display_image_header(
+        image, image_pipeline = _load_and_display_image_header(
             uploaded_file, idx, filename, keys, default_values, bit_depth_key
         )
         if image is None:
@@ -2077,8 +3801,13 @@ def analyze_and_display_image(idx, uploaded_file):
 
         # Determine default and max threshold based on ROI
         roi_tuple_for_threshold = display_roi_info(idx, image)
+        roi_stats = None
+        if roi_tuple_for_threshold:
+            roi_stats = image_pipeline.roi_stats(
+                _get_image_processing_settings(unique_id), roi_tuple_for_threshold
+            )
         default_threshold_val, max_threshold_val = _calculate_threshold_defaults(
-            image, roi_tuple_for_threshold
+            roi_stats
         )
 
         # Store the original threshold value from session state or use default
@@ -2095,13 +3824,16 @@ def analyze_and_display_image(idx, uploaded_file):
             normalize,
             invert,
             equalize_histogram,
+            equalization_method,
             saturated_pixels,
             threshold,
+            auto_threshold,
             new_rotation,
         ) = _display_combined_analysis_interface(
             idx,
             uploaded_file,
             image,
+            image_pipeline,
             keys,
             unique_id,
             default_group,
@@ -2111,8 +3843,10 @@ def analyze_and_display_image(idx, uploaded_file):
             normalize_key,
             invert_key,
             equalize_histogram_key,
+            equalization_method_key,
             saturated_pixels_key,
             threshold_key,
+            auto_threshold_key,
             current_threshold,
             max_threshold_val,
             roi_rotation_key,
@@ -2128,8 +3862,10 @@ def analyze_and_display_image(idx, uploaded_file):
             normalize,
             invert,
             equalize_histogram,
+            equalization_method,
             saturated_pixels,
             threshold,
+            auto_threshold,
             new_rotation,
             roi_rotation_key,
             magnification_key,
@@ -2138,11 +3874,13 @@ def analyze_and_display_image(idx, uploaded_file):
             normalize_key,
             saturated_pixels_key,
             equalize_histogram_key,
+            equalization_method_key,
             threshold_key,
+            auto_threshold_key,
             settings_changed_key,
             idx,
             image,
-            temp_path,
+            image_pipeline,
             last_roi_rotation_key,
         )
 
@@ -2153,11 +3891,13 @@ def _load_and_display_image_header(
     uploaded_file, idx, filename, keys, default_values, bit_depth_key
 ):
     """Loads the image and displays the header section for an image."""
-    image, temp_path = process_uploaded_file(uploaded_file)
+    image, image_pipeline = process_uploaded_file(uploaded_file)
     if image is None:
         st.error(f"❌ Failed to load image: {filename}")
         return None, None
-    st.session_state[keys["image_path"]] = temp_path
+    st.session_state[keys["image_path"]] = (
+        uploaded_file if isinstance(uploaded_file, str) else None
+    )
 
     header_col1, header_col2, header_col3 = st.columns([2, 1, 1])
     with header_col1:
@@ -2184,38 +3924,33 @@ def _load_and_display_image_header(
         st.info(f"**{bit_depth}-bit** (0-{(1 << bit_depth)-1})")
     with header_col3:
         if roi_tuple := display_roi_info(idx, image):
-            # Attempt to get profile range from the *processed* image
-            temp_roi_for_header = extract_roi_image(image, roi_tuple)
-            if temp_roi_for_header is not None:
-                profile_max_for_header = np.max(temp_roi_for_header, axis=0)
-                if len(profile_max_for_header) > 0:
-                    min_val_h, max_val_h = np.min(profile_max_for_header), np.max(
-                        profile_max_for_header
-                    )
-                    st.metric("Profile Range", f"{int(min_val_h)}-{int(max_val_h)}")
-                else:
-                    st.info("**Profile:** Not available")
+            # Profile range of the *processed* (display) image
+            roi_stats = image_pipeline.roi_stats(
+                _get_image_processing_settings(get_unique_id_for_image(uploaded_file)),
+                roi_tuple,
+            )
+            if roi_stats is not None:
+                st.metric(
+                    "Profile Range",
+                    f"{int(roi_stats.profile_min)}-{int(roi_stats.profile_max)}",
+                )
             else:
                 st.info("**Profile:** Not available")
 
         else:
             st.info("**Profile:** Select ROI")
     st.markdown("---")
-    return image, temp_path
+    return image, image_pipeline
 
 
-def _calculate_threshold_defaults(image_for_roi, roi_tuple):
+def _calculate_threshold_defaults(roi_stats: RoiStats | None):
     """Calculates default and max threshold values based on ROI profile."""
     default_threshold = 50
     max_threshold = 255
-    if roi_tuple:
-        temp_roi = extract_roi_image(image_for_roi, roi_tuple)  # Use the passed image
-        if temp_roi is not None:
-            profile_max = np.max(temp_roi, axis=0)
-            if len(profile_max) > 0:
-                min_val, max_val = np.min(profile_max), np.max(profile_max)
-                default_threshold = int(min_val + (max_val - min_val) * 0.4)
-                default_threshold = max(0, min(255, default_threshold))
+    if roi_stats is not None:
+        min_val, max_val = roi_stats.profile_min, roi_stats.profile_max
+        default_threshold = int(min_val + (max_val - min_val) * 0.4)
+        default_threshold = max(0, min(255, default_threshold))
     return default_threshold, max_threshold
 
 
@@ -2223,6 +3958,7 @@ def _display_combined_analysis_interface(
     idx,
     uploaded_file,
     image,
+    image_pipeline,
     keys,
     unique_id,
     default_group,
@@ -2232,8 +3968,10 @@ def _display_combined_analysis_interface(
     normalize_key,
     invert_key,
     equalize_histogram_key,
+    equalization_method_key,
     saturated_pixels_key,
     threshold_key,
+    auto_threshold_key,
     current_threshold,
     max_threshold_val,
     roi_rotation_key,
@@ -2287,14 +4025,24 @@ def _display_combined_analysis_interface(
         # Analysis controls in a container
         with st.container():
             st.markdown("**🔍 Analysis Controls**")
+            auto_threshold = st.toggle(
+                "Auto Threshold",
+                value=st.session_state[auto_threshold_key],
+                key=f"auto_threshold_widget_{unique_id}",
+                help="Score all thresholds and use the one that best resolves the line pairs",
+            )
             threshold = st.slider(
                 "Threshold Line",
                 min_value=0,
                 max_value=max_threshold_val,
                 value=current_threshold,
                 key=f"threshold_widget_{unique_id}",
+                disabled=auto_threshold,
                 help="Edge detection threshold - adjust to optimize line detection",
             )
+            auto_results = st.session_state.get(keys["analysis_results"]) or {}
+            if auto_threshold and "threshold_scores" in auto_results:
+                st.caption(f"Auto threshold: {auto_results['threshold']}")
 
             prev_rotation = st.session_state.get(roi_rotation_key, 0)
             rotation_options = ["0°", "90°", "180°", "270°"]
@@ -2339,6 +4087,22 @@ def _display_combined_analysis_interface(
                     key=f"equalize_histogram_widget_{unique_id}",
                     help="Histogram equalization",
                 )
+            equalization_method = st.radio(
+                "Equalization",
+                options=EQUALIZATION_METHODS,
+                index=EQUALIZATION_METHODS.index(
+                    st.session_state[equalization_method_key]
+                ),
+                format_func={
+                    "opencv": "Global",
+                    "clahe": "CLAHE (local)",
+                    "skimage": "scikit-image",
+                }.get,
+                horizontal=True,
+                key=f"equalization_method_widget_{unique_id}",
+                disabled=not equalize_histogram,
+                help="Global equalization, tiled local contrast (CLAHE), or the slower scikit-image reference",
+            )
             saturated_pixels = st.slider(
                 "Saturated Pixels (%)",
                 min_value=0.0,
@@ -2354,19 +4118,22 @@ def _display_combined_analysis_interface(
     with roi_col:
         st.markdown("### 🎯 ROI Selection & Results")
 
-        # ROI selection
+        # ROI selection on the pyramid level that fits the column
         st.markdown("**Select Analysis Region**")
-        pil_img = Image.fromarray(image)
+        selector_image, (scale_x, scale_y) = image_pipeline.display_level(
+            _get_image_processing_settings(unique_id)
+        )
+        pil_img = Image.fromarray(selector_image)
         draw = ImageDraw.Draw(pil_img)
         current_coords = st.session_state.get(keys["coordinates"])
 
         if current_coords:
             p1, p2 = current_coords
             coords = (
-                min(p1[0], p2[0]),
-                min(p1[1], p2[1]),
-                max(p1[0], p2[0]),
-                max(p1[1], p2[1]),
+                min(p1[0], p2[0]) / scale_x,
+                min(p1[1], p2[1]) / scale_y,
+                max(p1[0], p2[0]) / scale_x,
+                max(p1[1], p2[1]) / scale_y,
             )
             roi_valid_status = st.session_state.get(keys["roi_valid"], False)
             outline_color = (
@@ -2377,7 +4144,12 @@ def _display_combined_analysis_interface(
             draw.rectangle(coords, outline=outline_color, width=3)
 
         if roi_changed := handle_image_selection(
-            idx, uploaded_file, pil_img, key=f"usaf_image_{idx}", rotation=0
+            idx,
+            uploaded_file,
+            pil_img,
+            key=f"usaf_image_{idx}",
+            rotation=0,
+            display_scale=(scale_x, scale_y),
         ):
             st.session_state[f"settings_changed_{unique_id}"] = True
 
@@ -2507,8 +4279,10 @@ def _display_combined_analysis_interface(
         normalize,
         invert,
         equalize_histogram,
+        equalization_method,
         saturated_pixels,
         threshold,
+        auto_threshold,
         new_rotation,
     )
 
@@ -2526,8 +4300,10 @@ def _update_session_state_and_trigger_analysis(
     normalize,
     invert,
     equalize_histogram,
+    equalization_method,
     saturated_pixels,
     threshold,
+    auto_threshold,
     new_rotation,
     roi_rotation_key,
     magnification_key,
@@ -2536,11 +4312,13 @@ def _update_session_state_and_trigger_analysis(
     normalize_key,
     saturated_pixels_key,
     equalize_histogram_key,
+    equalization_method_key,
     threshold_key,
+    auto_threshold_key,
     settings_changed_key,
     idx,
     image,
-    temp_path,
+    image_pipeline,
     last_roi_rotation_key,
 ):
     """Updates session state based on UI changes and triggers analysis if needed."""
@@ -2570,11 +4348,17 @@ def _update_session_state_and_trigger_analysis(
     if st.session_state.get(equalize_histogram_key) != equalize_histogram:
         st.session_state[equalize_histogram_key] = equalize_histogram
         settings_changed = True
+    if st.session_state.get(equalization_method_key) != equalization_method:
+        st.session_state[equalization_method_key] = equalization_method
+        settings_changed = True
     if (
         st.session_state.get(threshold_key) != threshold
     ):  # Ensure threshold_key is used for comparison
         st.session_state[threshold_key] = threshold
         settings_changed = True
+    if st.session_state.get(auto_threshold_key) != auto_threshold:
+        st.session_state[auto_threshold_key] = auto_threshold
+        settings_changed = True
     if st.session_state.get(roi_rotation_key, 0) != new_rotation:
         st.session_state[roi_rotation_key] = new_rotation
         settings_changed = True
@@ -2604,24 +4388,35 @@ def _update_session_state_and_trigger_analysis(
     ):
         with st.spinner("🔄 Analyzing image..."):
             try:
-                img_proc = ImageProcessor(usaf_target=st.session_state.usaf_target)
+                # Reuse this image's processor so only changed stages rerun
+                img_proc = st.session_state.get(keys["image_processor"])
+                if (
+                    img_proc is None
+                    or img_proc.usaf_target is not st.session_state.usaf_target
+                ):
+                    img_proc = ImageProcessor(usaf_target=st.session_state.usaf_target)
+                    st.session_state[keys["image_processor"]] = img_proc
                 processing_params_analysis = {
                     "autoscale": st.session_state[autoscale_key],
                     "invert": st.session_state[invert_key],
                     "normalize": st.session_state[normalize_key],
                     "saturated_pixels": st.session_state[saturated_pixels_key],
                     "equalize_histogram": st.session_state[equalize_histogram_key],
+                    "equalization_method": st.session_state[equalization_method_key],
                 }
                 results_data = img_proc.process_and_analyze(
-                    temp_path,
+                    image_pipeline,
                     current_selected_roi_tuple,
                     group_for_trigger,
                     element_for_trigger,
                     use_max=True,
                     threshold=threshold_for_analysis,
                     roi_rotation=roi_rotation_for_analysis,
+                    auto_threshold=st.session_state[auto_threshold_key],
                     **processing_params_analysis,
                 )
+                # The frames stay in the image cache, which bounds their memory
+                img_proc.release_frames()
                 st.session_state[keys["analyzed_roi"]] = current_selected_roi_tuple
                 st.session_state[keys["analysis_results"]] = results_data
                 st.session_state[keys["last_group"]] = group_for_trigger
@@ -2778,14 +4573,16 @@ def _display_images_and_management_tab():
             help="Upload one or more images containing a USAF 1951 resolution target",
         ):
             for file in new_uploaded_files:
-                file_names = [
-                    f.name if hasattr(f, "name") else os.path.basename(f)
+                # Compare by name + content so same-named files from different
+                # acquisitions are both kept, while re-uploads are ignored
+                loaded_ids = {
+                    get_unique_id_for_image(f)
                     for f in st.session_state.uploaded_files_list
-                ]
+                }
                 new_file_name = (
                     file.name if hasattr(file, "name") else os.path.basename(file)
                 )
-                if new_file_name not in file_names:
+                if get_unique_id_for_image(file) not in loaded_ids:
                     st.session_state.uploaded_files_list.append(file)
                     st.success(f"✅ **Added:** {new_file_name}")
 
@@ -2962,6 +4759,7 @@ def _display_main_content():
     main_container = st.container()
     with main_container:
         if st.session_state.uploaded_files_list:
+            prefetch_images(st.session_state.uploaded_files_list)
             for idx, uploaded_file in enumerate(st.session_state.uploaded_files_list):
                 analyze_and_display_image(idx, uploaded_file)
         else:
@@ -0,0 +1,1241 @@
+"""
+Module-specific test file for the USAF analyzer module.
+Tests image loading and profile analysis functionality.
+"""
+
+import io
+import logging
+import os
+import sys
+import threading
+
+import cv2
+import numpy as np
+import pytest
+import streamlit as st
+import tifffile
+from skimage import exposure, img_as_ubyte
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules.analysis import usaf_analyzer
+from modules.analysis.usaf_analyzer import (
+    DecodedImageCache,
+    DiskImageCache,
+    ImagePipeline,
+    ImageProcessor,
+    _decode_image_buffer,
+    _load_image_array,
+    get_unique_id_for_image,
+    handle_image_selection,
+    iter_tiff_frames,
+    prefetch_images,
+    process_uploaded_file,
+    project_tiff_frames,
+)
+
+
+class DummyUpload:
+    """Minimal stand-in for Streamlit's UploadedFile."""
+
+    def __init__(self, name: str, data: bytes, file_id: str):
+        self.name = name
+        self.file_id = file_id
+        self._data = data
+
+    def getvalue(self) -> bytes:
+        return self._data
+
+
+class DummySessionState(dict):
+    """Dict with attribute access, like st.session_state."""
+
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+
+def _tiff_bytes(frame: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    tifffile.imwrite(buffer, frame)
+    return buffer.getvalue()
+
+
+# Test fixtures
+@pytest.fixture
+def test_frame():
+    """Create a 16-bit test frame with a gradient so every pixel is distinct."""
+    return np.arange(120 * 96, dtype=np.uint16).reshape(120, 96)
+
+
+@pytest.fixture
+def uncompressed_tiff(tmp_path, test_frame):
+    """Write the test frame to an uncompressed TIFF."""
+    path = tmp_path / "frame.tif"
+    tifffile.imwrite(path, test_frame)
+    return str(path)
+
+
+@pytest.fixture
+def compressed_tiff(tmp_path, test_frame):
+    """Write the test frame to a zlib-compressed TIFF."""
+    path = tmp_path / "frame_zlib.tif"
+    tifffile.imwrite(path, test_frame, compression="zlib")
+    return str(path)
+
+
+@pytest.fixture
+def stack_tiff(tmp_path):
+    """Write a six-page stack where page i is filled with i * 10 + (pixel % 7)."""
+    pattern = (np.arange(32 * 24).reshape(32, 24) % 7).astype(np.uint16)
+    stack = np.stack([pattern + i * 10 for i in range(6)])
+    path = tmp_path / "stack.tif"
+    tifffile.imwrite(path, stack)
+    return str(path), stack
+
+
+# Test image loading
+@pytest.mark.unit
+def test_load_uncompressed_tiff_is_memory_mapped(uncompressed_tiff, test_frame):
+    """Uncompressed TIFFs are returned as read-only memory maps."""
+    image = _load_image_array(uncompressed_tiff)
+
+    assert isinstance(image, np.memmap)
+    assert not image.flags.writeable
+    np.testing.assert_array_equal(image, test_frame)
+
+
+@pytest.mark.unit
+def test_load_big_endian_tiff(tmp_path, test_frame):
+    """Memory maps honour the byte order stored in the file."""
+    path = tmp_path / "frame_be.tif"
+    tifffile.imwrite(path, test_frame, byteorder=">")
+
+    np.testing.assert_array_equal(_load_image_array(str(path)), test_frame)
+
+
+@pytest.mark.unit
+def test_load_compressed_tiff_falls_back_to_decode(compressed_tiff, test_frame):
+    """Compressed TIFFs cannot be mapped and are decoded in full."""
+    image = _load_image_array(compressed_tiff)
+
+    assert not isinstance(image, np.memmap)
+    np.testing.assert_array_equal(image, test_frame)
+
+
+@pytest.mark.unit
+def test_image_processor_roi_from_memory_map(uncompressed_tiff, test_frame):
+    """The processor's raw ROI is a view into the mapped file."""
+    processor = ImageProcessor()
+    assert processor.load_image(uncompressed_tiff)
+    assert processor.set_roi((10, 20, 30, 40))
+
+    assert isinstance(processor.original_roi, np.memmap)
+    np.testing.assert_array_equal(processor.original_roi, test_frame[20:60, 10:40])
+
+
+@pytest.mark.unit
+def test_roi_first_processes_only_the_roi(test_frame):
+    """ROI-first mode matches renormalizing the ROI, without full-frame arrays."""
+    bgr = np.stack([test_frame, test_frame // 2, test_frame // 3], axis=-1)
+    roi, params = (10, 20, 30, 40), {"autoscale": True, "equalize_histogram": False}
+
+    roi_first = ImageProcessor(roi_first=True)
+    roi_first.update_processing_params(**params)
+    assert roi_first.set_pipeline(ImagePipeline(bgr))
+    assert roi_first.set_roi_rotation(1) is None and roi_first.set_roi(roi)
+
+    full_frame = ImageProcessor()
+    full_frame.update_processing_params(**params)
+    assert full_frame.set_pipeline(ImagePipeline(bgr))
+    full_frame.set_roi_rotation(1)
+    full_frame.set_roi(roi)
+    full_frame.apply_processing()  # Renormalizes the ROI on its own statistics
+
+    assert roi_first.image is None and roi_first.grayscale is None
+    np.testing.assert_array_equal(roi_first.original_roi, full_frame.original_roi)
+    np.testing.assert_array_equal(roi_first.roi, full_frame.roi)
+    assert not roi_first.set_roi((90, 0, 30, 10))  # Still validated against the frame
+
+
+@pytest.mark.unit
+def test_roi_stats_computed_only_when_normalization_reads_them(test_frame, monkeypatch):
+    """Equalizing with scikit-image skips the ROI statistics; rescaling computes them once."""
+    roi_stats = []
+    original_stats = usaf_analyzer.ImageStats
+
+    class CountingStats(original_stats):
+        def __init__(self, image):
+            if image.shape == (40, 30):
+                roi_stats.append(image)
+            super().__init__(image)
+
+    monkeypatch.setattr(usaf_analyzer, "ImageStats", CountingStats)
+    processor = ImageProcessor(roi_first=True)
+    processor.update_processing_params(equalize_histogram=True, equalization_method="skimage")
+    assert processor.set_pipeline(ImagePipeline(test_frame))
+    assert processor.set_roi((10, 20, 30, 40))
+    assert roi_stats == []
+
+    processor.update_processing_params(equalize_histogram=False, autoscale=True)
+    processor.apply_processing()
+    processor.apply_processing()
+    assert len(roi_stats) == 1 and roi_stats[0] is processor.original_roi
+
+    assert processor.set_roi((12, 20, 30, 40))
+    assert len(roi_stats) == 2 and roi_stats[1] is processor.original_roi
+
+
+@pytest.mark.unit
+def test_reanalysis_recomputes_only_changed_stages(monkeypatch, test_frame):
+    """A new threshold reuses the ROI and profile; results match a fresh run."""
+    calls = []
+    for name in ("set_pipeline", "set_roi", "get_line_profile"):
+        method = getattr(ImageProcessor, name)
+        monkeypatch.setattr(
+            ImageProcessor,
+            name,
+            lambda self, *args, _name=name, _method=method, **kwargs: (
+                calls.append(_name) or _method(self, *args, **kwargs)
+            ),
+        )
+    pipeline, roi = ImagePipeline(test_frame), (5, 5, 60, 40)
+
+    processor = ImageProcessor()
+    processor.process_and_analyze(pipeline, roi, 2, 2, threshold=100)
+    assert calls == ["set_pipeline", "set_roi", "get_line_profile"]
+
+    calls.clear()
+    rerun = processor.process_and_analyze(pipeline, roi, 2, 2, threshold=140)
+    assert calls == []
+    fresh = ImageProcessor().process_and_analyze(pipeline, roi, 2, 2, threshold=140)
+    assert rerun["boundaries"] == fresh["boundaries"]
+
+    calls.clear()
+    rerun = processor.process_and_analyze(
+        pipeline, roi, 2, 2, threshold=140, roi_rotation=1, invert=True
+    )
+    assert calls == ["set_roi", "get_line_profile"]
+    fresh = ImageProcessor().process_and_analyze(
+        pipeline, roi, 2, 2, threshold=140, roi_rotation=1, invert=True
+    )
+    assert rerun["profile"] == fresh["profile"]
+    assert rerun["boundaries"] == fresh["boundaries"]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("roi_first", [False, True])
+def test_released_processor_holds_no_frames(test_frame, roi_first):
+    """After release_frames only ROI-sized arrays remain; reanalysis matches a fresh run."""
+    pipeline, roi = ImagePipeline(test_frame), (5, 5, 60, 40)
+
+    def frame_sized_arrays(processor):
+        arrays = [value for value in vars(processor).values() if isinstance(value, np.ndarray)]
+        bases = [array.base for array in arrays if isinstance(array.base, np.ndarray)]
+        return [array for array in arrays + bases if array.size >= test_frame.size]
+
+    processor = ImageProcessor(roi_first=roi_first)
+    for threshold, params in ((100, {}), (140, {}), (140, {"invert": True})):
+        rerun = processor.process_and_analyze(pipeline, roi, 2, 2, threshold=threshold, **params)
+        processor.release_frames()
+        assert processor.pipeline is None and frame_sized_arrays(processor) == []
+
+        fresh = ImageProcessor(roi_first=roi_first).process_and_analyze(
+            pipeline, roi, 2, 2, threshold=threshold, **params
+        )
+        assert rerun["profile"] == fresh["profile"]
+        assert rerun["boundaries"] == fresh["boundaries"]
+
+
+@pytest.mark.unit
+def test_reanalysis_does_not_keep_previous_line_pairs():
+    """A threshold finding fewer boundaries than the last one reports no line pairs."""
+    row = np.zeros(120, dtype=np.uint8)
+    for i, start in enumerate(range(10, 100, 30)):
+        row[start : start + 15] = 250 if i == 0 else 150
+    pipeline, roi = ImagePipeline(np.tile(row, (40, 1))), (0, 0, 120, 40)
+    params = {"autoscale": False, "equalize_histogram": False}
+
+    processor = ImageProcessor()
+    for threshold in (100, 220):
+        rerun = processor.process_and_analyze(pipeline, roi, 2, 2, threshold=threshold, **params)
+        fresh = ImageProcessor().process_and_analyze(
+            pipeline, roi, 2, 2, threshold=threshold, **params
+        )
+        for key in ("num_line_pairs", "line_pair_widths", "avg_line_pair_width", "contrast"):
+            assert rerun[key] == fresh[key], key
+    assert rerun["num_line_pairs"] == 0
+
+
+@pytest.mark.unit
+def test_debug_statistics_are_opt_in(monkeypatch, caplog):
+    """Value ranges are only computed and logged in debug-statistics mode."""
+    reductions = []
+    original_min = np.min
+
+    def counting_min(*args, **kwargs):
+        reductions.append(args[0].shape)
+        return original_min(*args, **kwargs)
+
+    monkeypatch.setattr(np, "min", counting_min)
+    profile = np.array([200, 200, 40, 40, 200, 200, 40, 40, 200], dtype=np.uint8)
+
+    with caplog.at_level(logging.DEBUG, logger=usaf_analyzer.logger.name):
+        usaf_analyzer.find_line_pair_boundaries_threshold(profile, 100)
+        assert not reductions and "Threshold profile" not in caplog.text
+
+        monkeypatch.setattr(usaf_analyzer, "DEBUG_STATISTICS", True)
+        usaf_analyzer.find_line_pair_boundaries_threshold(profile, 100)
+    assert "Threshold profile: shape=(9,), dtype=uint8, range=40-200" in caplog.text
+
+
+@pytest.mark.unit
+def test_iter_tiff_frames_yields_every_page(stack_tiff):
+    """Frames come out one page at a time, in file order."""
+    path, stack = stack_tiff
+    frames = list(iter_tiff_frames(path))
+
+    assert len(frames) == len(stack)
+    for frame, expected in zip(frames, stack):
+        np.testing.assert_array_equal(frame, expected)
+
+    selected = list(iter_tiff_frames(path, frames=slice(1, 4)))
+    np.testing.assert_array_equal(selected[0], stack[1])
+    assert len(selected) == 3
+
+
+@pytest.mark.unit
+def test_iter_tiff_frames_selects_interleaved_channel(stack_tiff, monkeypatch):
+    """Channel selection de-interleaves ScanImage-style page order."""
+    path, stack = stack_tiff
+    monkeypatch.setattr(usaf_analyzer, "_scanimage_channel_count", lambda tif: 2)
+
+    channel_one = list(iter_tiff_frames(path, channel=1))
+
+    assert len(channel_one) == 3
+    for frame, expected in zip(channel_one, stack[1::2]):
+        np.testing.assert_array_equal(frame, expected)
+    with pytest.raises(ValueError):
+        next(iter_tiff_frames(path, channel=2))
+
+
+@pytest.mark.unit
+def test_project_tiff_frames(stack_tiff):
+    """Streaming projections match the in-memory reductions."""
+    path, stack = stack_tiff
+
+    np.testing.assert_allclose(project_tiff_frames(path, "mean"), stack.mean(axis=0))
+    max_projection = project_tiff_frames(path, "max")
+    assert max_projection.dtype == stack.dtype
+    np.testing.assert_array_equal(max_projection, stack.max(axis=0))
+    np.testing.assert_array_equal(
+        _load_image_array(path, frame_projection="max"), stack.max(axis=0)
+    )
+    with pytest.raises(ValueError):
+        project_tiff_frames(path, "median")
+
+
+@pytest.mark.unit
+def test_decode_tiff_buffer_is_zero_copy(test_frame):
+    """Uncompressed TIFF uploads decode to a view of the uploaded bytes."""
+    buffer = io.BytesIO()
+    tifffile.imwrite(buffer, test_frame)
+
+    image = _decode_image_buffer(buffer.getvalue(), "upload.tif")
+
+    assert not image.flags.owndata
+    np.testing.assert_array_equal(image, test_frame)
+
+
+@pytest.mark.unit
+def test_decode_compressed_tiff_buffer(test_frame):
+    """Compressed TIFF uploads are decoded from memory."""
+    buffer = io.BytesIO()
+    tifffile.imwrite(buffer, test_frame, compression="zlib")
+
+    np.testing.assert_array_equal(
+        _decode_image_buffer(buffer.getvalue(), "upload.tiff"), test_frame
+    )
+
+
+@pytest.mark.unit
+def test_decode_png_buffer():
+    """Non-TIFF uploads are decoded with OpenCV from memory."""
+    frame = (np.arange(40 * 30).reshape(40, 30) % 256).astype(np.uint8)
+    _, encoded = cv2.imencode(".png", frame)
+
+    np.testing.assert_array_equal(
+        _decode_image_buffer(encoded.tobytes(), "upload.png"), frame
+    )
+
+
+@pytest.mark.unit
+def test_process_and_analyze_accepts_decoded_array(uncompressed_tiff):
+    """Analysing a decoded array matches analysing the file it came from."""
+    roi = (5, 5, 60, 40)
+    from_path = ImageProcessor().process_and_analyze(
+        uncompressed_tiff, roi, 2, 2, threshold=120
+    )
+    from_array = ImageProcessor().process_and_analyze(
+        _load_image_array(uncompressed_tiff), roi, 2, 2, threshold=120
+    )
+
+    assert from_array["profile"] == from_path["profile"]
+    assert from_array["boundaries"] == from_path["boundaries"]
+
+
+# Test image caching
+@pytest.mark.unit
+def test_image_cache_evicts_least_recently_used():
+    """The cache stays within its byte budget, evicting the oldest entry first."""
+    cache = DecodedImageCache(max_bytes=250)
+    for name in ("a", "b"):
+        cache.put((name, "raw"), np.zeros(100, dtype=np.uint8))
+    cache.get(("a", "raw"))
+    cache.put(("c", "raw"), np.zeros(100, dtype=np.uint8))
+
+    assert cache.get(("b", "raw")) is None
+    assert cache.get(("a", "raw")) is not None
+    assert cache.current_bytes == 200
+
+    cache.put(("huge", "raw"), np.zeros(1000, dtype=np.uint8))
+    assert cache.get(("huge", "raw")) is None
+
+
+@pytest.mark.unit
+def test_image_cache_counts_shared_arrays_once(test_frame):
+    """Pipeline stages that return their input don't count it again."""
+    cache = DecodedImageCache(max_bytes=10 * test_frame.nbytes)
+    cache.put(("frame", "raw"), test_frame)
+    pipeline = ImagePipeline(test_frame, "frame", cache)
+    assert pipeline.grayscale is pipeline.rgb is test_frame
+    assert cache.current_bytes == test_frame.nbytes
+
+    params = {"autoscale": True, "equalize_histogram": False}
+    normalized = pipeline.normalized(params)
+    assert pipeline.normalized_grayscale(params) is normalized
+    assert cache.current_bytes == test_frame.nbytes + normalized.nbytes
+
+    # The frame's bytes are freed once the last key holding it is evicted
+    cache.max_bytes = normalized.nbytes
+    cache.put(("other", "raw"), np.zeros(0, dtype=np.uint8))
+    assert cache.get(("frame", "grayscale")) is None
+    key = ("frame", "normalized_grayscale", *usaf_analyzer._processing_params_key(params))
+    assert cache.get(key) is normalized
+    assert cache.current_bytes == normalized.nbytes
+
+
+@pytest.mark.unit
+def test_image_cache_entries_are_read_only():
+    """Cached arrays are shared between sessions and cannot be modified."""
+    cache = DecodedImageCache(max_bytes=1000)
+    cache.put(("a", "raw"), np.zeros(10))
+
+    with pytest.raises(ValueError):
+        cache.get(("a", "raw"))[0] = 1
+
+
+@pytest.mark.unit
+def test_disk_cache_survives_restart(tmp_path, test_frame):
+    """A fresh memory cache reads persisted images back as memory maps."""
+    key = ("hash", "normalized", ("autoscale", True))
+    DecodedImageCache(disk=DiskImageCache(str(tmp_path))).put(key, test_frame)
+
+    restarted = DecodedImageCache(disk=DiskImageCache(str(tmp_path)))
+    value = restarted.get(key)
+
+    assert isinstance(value, np.memmap)
+    assert not value.flags.writeable
+    np.testing.assert_array_equal(value, test_frame)
+    assert restarted.get(("hash", "normalized_grayscale")) is None
+
+
+@pytest.mark.unit
+def test_disk_cache_discards_corrupt_entries(tmp_path, test_frame):
+    """Truncated cache files are deleted and reported as misses."""
+    cache = DiskImageCache(str(tmp_path))
+    cache.put(("hash", "raw"), test_frame)
+    (path,) = tmp_path.glob("*.npy")
+    path.write_bytes(path.read_bytes()[:-10])
+
+    assert cache.get(("hash", "raw")) is None
+    assert not path.exists()
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("order", ["C", "F"])
+def test_disk_cache_discards_entries_with_damaged_data(tmp_path, test_frame, order):
+    """Bit flips in the array data are caught by the payload checksum."""
+    frame = np.asarray(test_frame, order=order)
+    DiskImageCache(str(tmp_path)).put(("hash", "raw"), frame)
+    np.testing.assert_array_equal(DiskImageCache(str(tmp_path)).get(("hash", "raw")), frame)
+    (path,) = tmp_path.glob("*.npy")
+    data = bytearray(path.read_bytes())
+    data[len(data) // 2] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    assert DiskImageCache(str(tmp_path)).get(("hash", "raw")) is None
+    assert not path.exists()
+
+
+@pytest.mark.unit
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    """The cache directory stays within budget, dropping the oldest entry first."""
+    frame = np.zeros(1000, dtype=np.uint8)
+    cache = DiskImageCache(str(tmp_path), max_bytes=2500)
+    cache.put(("a", "raw"), frame)
+    cache.put(("b", "raw"), frame)
+    os.utime(cache._path(("a", "raw")), ns=(0, 0))
+    os.utime(cache._path(("b", "raw")), ns=(1, 1))
+    cache.get(("a", "raw"))  # Refreshes a's modification time
+
+    cache.put(("c", "raw"), frame)
+
+    assert cache.get(("b", "raw")) is None
+    assert cache.get(("a", "raw")) is not None
+    assert cache.get(("c", "raw")) is not None
+
+
+@pytest.mark.unit
+def test_disk_cache_removes_orphaned_temp_files(tmp_path):
+    """Temp files left by interrupted writes are swept once they are stale."""
+    stale = tmp_path / "entry.npy.1.1.tmp"
+    fresh = tmp_path / "entry.npy.2.2.tmp"
+    stale.write_bytes(b"partial")
+    fresh.write_bytes(b"partial")
+    os.utime(stale, ns=(0, 0))
+
+    DiskImageCache(str(tmp_path))
+
+    assert not stale.exists()
+    assert fresh.exists()
+
+
+@pytest.mark.unit
+def test_unique_id_depends_on_contents(test_frame):
+    """Same-named files only share an ID when their contents match."""
+    first = DummyUpload("AF_00001.tif", _tiff_bytes(test_frame), "id-1")
+    same = DummyUpload("AF_00001.tif", _tiff_bytes(test_frame), "id-2")
+    different = DummyUpload("AF_00001.tif", _tiff_bytes(test_frame + 1), "id-3")
+
+    assert get_unique_id_for_image(first) == get_unique_id_for_image(same)
+    assert get_unique_id_for_image(first) != get_unique_id_for_image(different)
+
+
+@pytest.mark.unit
+def test_process_uploaded_file_decodes_once(test_frame, monkeypatch):
+    """Re-uploading identical bytes reuses the cached decode and display image."""
+    monkeypatch.setattr(usaf_analyzer, "_image_cache", DecodedImageCache(1 << 24))
+    decode_calls = []
+    original_decode = usaf_analyzer._decode_image_buffer
+
+    def counting_decode(data, filename, **kwargs):
+        decode_calls.append(filename)
+        return original_decode(data, filename, **kwargs)
+
+    monkeypatch.setattr(usaf_analyzer, "_decode_image_buffer", counting_decode)
+    data = _tiff_bytes(test_frame)
+
+    display, pipeline = process_uploaded_file(DummyUpload("a.tif", data, "tab-1"))
+    display_again, pipeline_again = process_uploaded_file(
+        DummyUpload("b.tif", data, "tab-2")
+    )
+
+    assert len(decode_calls) == 1
+    assert display_again is display
+    assert pipeline_again.raw is pipeline.raw
+    assert display.shape == test_frame.shape + (3,)
+
+
+@pytest.mark.unit
+def test_prefetch_decodes_uploads_in_background(test_frame, monkeypatch):
+    """Prefetched uploads are decoded by the pool and only read by the expanders."""
+    monkeypatch.setattr(usaf_analyzer, "_image_cache", DecodedImageCache(1 << 24))
+    decode_threads = []
+    original_decode = usaf_analyzer._decode_image_buffer
+
+    def recording_decode(data, filename, **kwargs):
+        decode_threads.append(threading.current_thread().name)
+        return original_decode(data, filename, **kwargs)
+
+    monkeypatch.setattr(usaf_analyzer, "_decode_image_buffer", recording_decode)
+    uploads = [
+        DummyUpload(f"AF_{i:05d}.tif", _tiff_bytes(test_frame + i), f"prefetch-{i}")
+        for i in range(3)
+    ]
+
+    prefetch_images(uploads)
+    prefetch_images(uploads)  # Already in flight or cached: nothing resubmitted
+    displays = [process_uploaded_file(upload)[0] for upload in uploads]
+
+    assert len(decode_threads) == 3
+    assert all(name.startswith("usaf-prefetch") for name in decode_threads)
+    assert all(display.shape == test_frame.shape + (3,) for display in displays)
+
+
+@pytest.mark.unit
+def test_prefetch_errors_are_only_logged(monkeypatch, caplog):
+    """Workers have no script context; the main thread shows the decode error."""
+    monkeypatch.setattr(usaf_analyzer, "_image_cache", DecodedImageCache(1 << 24))
+    shown = []
+    monkeypatch.setattr(
+        st, "error", lambda message: shown.append(threading.current_thread().name)
+    )
+    upload = DummyUpload("broken.tif", b"not a tiff", "prefetch-broken")
+
+    with caplog.at_level(logging.ERROR, logger=usaf_analyzer.logger.name):
+        prefetch_images([upload])
+        usaf_analyzer._wait_for_prefetch(usaf_analyzer.get_image_content_hash(upload))
+    assert shown == [] and "Failed to decode TIFF: broken.tif" in caplog.text
+
+    assert process_uploaded_file(upload) == (None, None)
+    assert shown == [threading.current_thread().name]
+
+
+# Test the shared image pipeline
+@pytest.mark.unit
+def test_analysis_reuses_display_normalization(test_frame, monkeypatch):
+    """Display and analysis share one decode and one full-frame normalization."""
+    monkeypatch.setattr(usaf_analyzer, "_image_cache", DecodedImageCache(1 << 24))
+    normalize_calls = []
+    original_normalize = usaf_analyzer.normalize_to_uint8
+
+    def counting_normalize(image, **kwargs):
+        normalize_calls.append(image.shape)
+        return original_normalize(image, **kwargs)
+
+    monkeypatch.setattr(usaf_analyzer, "normalize_to_uint8", counting_normalize)
+    params = {
+        "autoscale": True,
+        "invert": False,
+        "normalize": False,
+        "saturated_pixels": 0.5,
+        "equalize_histogram": True,
+        "equalization_method": "opencv",
+    }
+    pipeline = ImagePipeline(test_frame, content_hash="frame")
+    display = pipeline.display_image(params)
+
+    results = ImageProcessor().process_and_analyze(
+        pipeline, (0, 0, 50, 30), 2, 2, threshold=100, **params
+    )
+
+    assert normalize_calls == [test_frame.shape]
+    assert "error" not in results
+    np.testing.assert_array_equal(display[..., 0], pipeline.normalized(params))
+
+
+@pytest.mark.unit
+def test_pipeline_converts_bgr_once():
+    """Colour images are converted BGR to RGB and to grayscale exactly once."""
+    bgr = np.zeros((4, 5, 3), dtype=np.uint8)
+    bgr[..., 0] = 200  # Blue in OpenCV's channel order
+    pipeline = ImagePipeline(bgr)
+
+    assert pipeline.rgb[0, 0].tolist() == [0, 0, 200]
+    assert pipeline.rgb is pipeline.rgb
+    assert pipeline.grayscale.shape == (4, 5)
+
+
+# Test normalization
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "params, dtype, bounds",
+    [
+        ({"autoscale": True}, np.uint16, lambda im, ch: np.percentile(ch, (0.25, 99.75))),
+        (
+            {"autoscale": False, "normalize": True},
+            np.uint16,
+            lambda im, ch: (ch.min(), ch.max()),
+        ),
+        ({"autoscale": False, "bit_depth": 12}, np.uint16, lambda im, ch: (0, 4095)),
+        # Floats are scaled to 0-1 as a whole; bit_depth does not apply to them
+        (
+            {"autoscale": False, "bit_depth": 12},
+            np.float64,
+            lambda im, ch: (im.min(), im.max()),
+        ),
+        ({"autoscale": False}, np.float64, lambda im, ch: (im.min(), im.max())),
+    ],
+)
+def test_normalize_multichannel_matches_per_channel_rescale(params, dtype, bounds):
+    """Every channel is stretched independently, as rescale_intensity would."""
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 4096, (64, 80, 3)).astype(dtype)
+    image[..., 1] //= 4  # A dimmer channel must still be stretched on its own
+
+    result = usaf_analyzer.normalize_to_uint8(image, **params)
+
+    assert result.dtype == np.uint8
+    for c in range(3):
+        channel = image[..., c].astype(np.float64)
+        expected = img_as_ubyte(
+            exposure.rescale_intensity(
+                channel,
+                in_range=tuple(bounds(image, image[..., c])),
+                out_range=(0.0, 1.0),
+            )
+        )
+        np.testing.assert_array_equal(result[..., c], expected)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16, np.int16])
+def test_histogram_percentiles_match_numpy(dtype):
+    """Histogram percentiles equal np.percentile bit for bit."""
+    info = np.iinfo(dtype)
+    rng = np.random.default_rng(1)
+    image = rng.integers(info.min, info.max, (50, 33, 3), endpoint=True).astype(dtype)
+    percentiles = (0.0, 0.25, 1.7, 50.0, 99.75, 100.0)
+
+    result = usaf_analyzer._histogram_percentiles(
+        usaf_analyzer._channel_histograms(image), int(info.min), percentiles
+    )
+
+    expected = np.percentile(image.reshape(-1, 3), percentiles, axis=0)
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.unit
+def test_autoscale_reuses_cached_histogram(test_frame, monkeypatch):
+    """Moving the saturated-pixels slider doesn't rebuild the histogram."""
+    monkeypatch.setattr(usaf_analyzer, "_image_cache", DecodedImageCache(1 << 24))
+    builds = []
+    original_histograms = usaf_analyzer._channel_histograms
+
+    def counting_histograms(image):
+        builds.append(image.shape)
+        return original_histograms(image)
+
+    monkeypatch.setattr(usaf_analyzer, "_channel_histograms", counting_histograms)
+    pipeline = ImagePipeline(test_frame, content_hash="frame")
+
+    for saturated_pixels in (0.5, 1.0, 5.0):
+        pipeline.normalized({"autoscale": True, "saturated_pixels": saturated_pixels})
+
+    assert len(builds) == 1
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("dtype", [np.uint16, np.int16, np.float32])
+def test_image_stats_match_numpy(dtype):
+    """Histogram-derived min and max equal the direct reductions."""
+    rng = np.random.default_rng(2)
+    image = rng.integers(-500, 3000, (40, 30, 3)).astype(dtype)
+
+    stats = usaf_analyzer.ImageStats(image)
+
+    np.testing.assert_array_equal(stats.channel_min, image.min(axis=(0, 1)))
+    np.testing.assert_array_equal(stats.channel_max, image.max(axis=(0, 1)))
+    assert stats.min == image.min() and stats.max == image.max()
+    assert (stats.histogram is None) == (dtype == np.float32)
+
+
+@pytest.mark.unit
+def test_roi_stats_feed_threshold_defaults(test_frame, display_params, monkeypatch):
+    """Header and threshold defaults share one memoized ROI profile."""
+    monkeypatch.setattr(usaf_analyzer, "_image_cache", DecodedImageCache(1 << 24))
+    pipeline = ImagePipeline(test_frame, content_hash="frame")
+    roi = (10, 20, 30, 40)
+
+    roi_stats = pipeline.roi_stats(display_params, roi)
+
+    assert pipeline.roi_stats(display_params, roi) is roi_stats
+    roi_image = pipeline.display_image(display_params)[20:60, 10:40]
+    column_max = roi_image.max(axis=0)
+    np.testing.assert_array_equal(roi_stats.column_max, column_max)
+    expected = int(column_max.min() + (column_max.max() - column_max.min()) * 0.4)
+    assert usaf_analyzer._calculate_threshold_defaults(roi_stats) == (expected, 255)
+    assert usaf_analyzer._calculate_threshold_defaults(None) == (50, 255)
+
+
+@pytest.mark.unit
+def test_image_stats_computed_once_per_image(test_frame, monkeypatch):
+    """Bit depth, autoscale and full-range all read the same statistics."""
+    monkeypatch.setattr(usaf_analyzer, "_image_cache", DecodedImageCache(1 << 24))
+    stats_images = []
+    original_stats = usaf_analyzer.ImageStats
+
+    class CountingStats(original_stats):
+        def __init__(self, image):
+            stats_images.append(image.shape)
+            super().__init__(image)
+
+    monkeypatch.setattr(usaf_analyzer, "ImageStats", CountingStats)
+    pipeline = ImagePipeline(test_frame, content_hash="frame")
+
+    pipeline.normalized({"autoscale": True})
+    pipeline.normalized({"autoscale": False, "normalize": True})
+    pipeline.normalized({"autoscale": False, "normalize": False})
+
+    assert stats_images == [test_frame.shape]
+    assert pipeline.bit_depth == 14
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("dtype, shape", [
+    (np.uint16, (40, 30)),
+    (np.uint16, (40, 30, 3)),
+    (np.uint8, (40, 30, 3)),
+    (np.uint8, (40, 30, 1)),
+])
+@pytest.mark.parametrize("invert", [False, True])
+def test_lookup_tables_match_float_rescale(dtype, shape, invert):
+    """8- and 16-bit sources go through lookup tables with identical output."""
+    rng = np.random.default_rng(3)
+    image = rng.integers(0, np.iinfo(dtype).max // 3, shape).astype(dtype)
+    is_multichannel = usaf_analyzer._is_multichannel(image)
+
+    # uint8 sources are only rescaled with normalize set
+    for autoscale in (True, False):
+        result = usaf_analyzer.normalize_to_uint8(
+            image, autoscale=autoscale, normalize=True, invert=invert
+        )
+
+        low, high = usaf_analyzer._normalization_bounds(
+            image, is_multichannel, autoscale, True, 0.5
+        )
+        expected = usaf_analyzer._rescale_to_uint8(image, low, high)
+        if invert:
+            expected = 255 - expected
+        assert result.shape == image.shape
+        np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.unit
+def test_normalize_flat_channel_is_black():
+    """A channel without contrast maps to zero instead of dividing by zero."""
+    image = np.full((4, 4, 3), 1000, dtype=np.uint16)
+    image[0, 0, 2] = 2000
+
+    result = usaf_analyzer.normalize_to_uint8(image, autoscale=False, normalize=True)
+
+    assert not result[..., :2].any()
+    assert result[0, 0, 2] == 255
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("autoscale", [True, False])
+def test_normalize_in_float32(autoscale):
+    """Rescaling in float32 is within one level of float64 and leaves the input alone."""
+    rng = np.random.default_rng(7)
+    image = rng.random((40, 30, 3)) * 5000 - 200
+    original = image.copy()
+    expected = usaf_analyzer.normalize_to_uint8(image, autoscale=autoscale)
+
+    lean = usaf_analyzer.normalize_to_uint8(image, autoscale=autoscale, lean=True)
+    assert np.abs(lean.astype(int) - expected).max() <= 1
+    np.testing.assert_array_equal(image, original)
+
+    frame = rng.integers(0, 255, (8, 8)).astype(np.uint8)
+    assert usaf_analyzer.normalize_to_uint8(frame, autoscale=False) is not frame
+
+
+@pytest.mark.unit
+def test_lean_mode_is_part_of_the_cache_key(monkeypatch):
+    """Switching the lean mode does not serve images normalized in the other mode."""
+    monkeypatch.setattr(usaf_analyzer, "_image_cache", DecodedImageCache(1 << 24))
+    rng = np.random.default_rng(3)
+    image = rng.random((40, 30)) * 5000 - 200
+    params = {"autoscale": False, "equalize_histogram": False}
+    pipeline = ImagePipeline(image, content_hash="float-frame")
+
+    monkeypatch.setattr(usaf_analyzer, "MEMORY_LEAN", False)
+    full = pipeline.normalized(params)
+    monkeypatch.setattr(usaf_analyzer, "MEMORY_LEAN", True)
+    lean = pipeline.normalized(params)
+
+    assert lean is not full
+    np.testing.assert_array_equal(
+        lean, usaf_analyzer.normalize_to_uint8(image, lean=True, **params)
+    )
+    assert pipeline.normalized(params) is lean
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("shape", [(64, 48), (64, 48, 3)])
+def test_uint16_equalization_matches_opencv(shape):
+    """16-bit equalization maps values like cv2.equalizeHist does for 8-bit."""
+    rng = np.random.default_rng(5)
+    image8 = rng.integers(20, 200, shape).astype(np.uint8)
+    image16 = image8.astype(np.uint16)
+    stats = usaf_analyzer.ImageStats(image16)
+
+    for source, image_stats in ((image8, None), (image16, None), (image16, stats)):
+        result = usaf_analyzer.normalize_to_uint8(
+            source, equalize_histogram=True, stats=image_stats
+        )
+        channels = [image8] if image8.ndim == 2 else np.moveaxis(image8, -1, 0)
+        expected = np.stack([cv2.equalizeHist(c) for c in channels], axis=-1)
+        np.testing.assert_array_equal(result, expected.reshape(shape))
+
+    flat = np.full((4, 4), 40000, dtype=np.uint16)
+    assert (usaf_analyzer.normalize_to_uint8(flat, equalize_histogram=True) == 155).all()
+
+
+@pytest.mark.unit
+def test_equalization_methods(test_frame):
+    """Each equalization backend returns a uint8 image of the source's shape."""
+    expected = img_as_ubyte(exposure.equalize_hist(test_frame))
+    result = usaf_analyzer.normalize_to_uint8(
+        test_frame, equalize_histogram=True, equalization_method="skimage"
+    )
+    np.testing.assert_array_equal(result, expected)
+
+    for image in (test_frame, test_frame.astype(np.float32)):
+        result = usaf_analyzer.normalize_to_uint8(
+            image, equalize_histogram=True, equalization_method="clahe", invert=True
+        )
+        assert result.dtype == np.uint8 and result.shape == test_frame.shape
+        assert result.min() < 64 and result.max() > 192
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("dtype, high", [(np.uint8, 256), (np.uint16, 1 << 14)])
+def test_opencv_equalization_matches_skimage(dtype, high):
+    """The OpenCV backend stays within two levels of scikit-image's equalize_hist."""
+    frame = np.random.default_rng(0).integers(0, high, (256, 256)).astype(dtype)
+    expected = img_as_ubyte(exposure.equalize_hist(frame))
+    result = usaf_analyzer.normalize_to_uint8(
+        frame, equalize_histogram=True, equalization_method="opencv"
+    )
+
+    assert result.dtype == np.uint8 and result.shape == frame.shape
+    np.testing.assert_allclose(result, expected, atol=2)
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(
+    not os.environ.get("USAF_RUN_BENCHMARKS"),
+    reason="benchmark; set USAF_RUN_BENCHMARKS=1 to run",
+)
+def test_benchmark_equalization_methods():
+    """The OpenCV backends equalize a 16-bit frame at least 5x faster than scikit-image."""
+    from tests.testing_utils import benchmark_function
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 1 << 14, (2048, 2048)).astype(np.uint16)
+    timings = {
+        method: benchmark_function(
+            usaf_analyzer.normalize_to_uint8,
+            frame,
+            equalize_histogram=True,
+            equalization_method=method,
+            iterations=3,
+        )["min_time"]
+        for method in usaf_analyzer.EQUALIZATION_METHODS
+    }
+
+    for method in ("opencv", "clahe"):
+        assert timings[method] * 5 <= timings["skimage"], timings
+
+
+@pytest.mark.unit
+def test_bit_depth_from_tiff_metadata(tmp_path):
+    """A recorded MaxSampleValue wins over the pixel maximum."""
+    frame = np.full((8, 8), 4095, dtype=np.uint16)
+    path = tmp_path / "adc14.tif"
+    tifffile.imwrite(path, frame, extratags=[(281, "H", 1, 16383, True)])
+
+    assert ImagePipeline(frame, source=str(path)).bit_depth == 14
+    assert ImagePipeline(frame).bit_depth == 12
+
+
+@pytest.mark.unit
+def test_bit_depth_scanned_once_without_metadata(uncompressed_tiff, monkeypatch):
+    """Plain 16-bit TIFFs fall back to one pixel scan, and only when needed."""
+    scans = []
+    original_bit_depth = usaf_analyzer._get_effective_bit_depth
+
+    def counting_bit_depth(image, stats=None):
+        scans.append(image.shape)
+        return original_bit_depth(image, stats)
+
+    monkeypatch.setattr(usaf_analyzer, "_get_effective_bit_depth", counting_bit_depth)
+    pipeline = ImagePipeline(_load_image_array(uncompressed_tiff), source=uncompressed_tiff)
+    bit_depth_params = {"autoscale": False, "normalize": False}
+
+    pipeline.normalized({"autoscale": True})
+    assert scans == []
+    pipeline.normalized(bit_depth_params)
+    pipeline.normalized({**bit_depth_params, "invert": True})
+    assert pipeline.bit_depth == 14
+    assert len(scans) == 1
+
+
+@pytest.fixture
+def display_params():
+    """Processing parameters used for display images."""
+    return {
+        "autoscale": True,
+        "invert": False,
+        "normalize": False,
+        "saturated_pixels": 0.5,
+        "equalize_histogram": False,
+    }
+
+
+@pytest.mark.unit
+def test_display_level_fits_viewport(display_params):
+    """Large frames are shown on a pyramid level no wider than the viewport."""
+    frame = np.random.default_rng(0).integers(0, 4096, (900, 2500), dtype=np.uint16)
+    pipeline = ImagePipeline(frame)
+
+    level, (scale_x, scale_y) = pipeline.display_level(display_params, max_width=700)
+
+    assert level.shape[1] <= 700
+    assert level.shape[1] * scale_x == pytest.approx(2500)
+    assert level.shape[0] * scale_y == pytest.approx(900)
+    full, scale = pipeline.display_level(display_params, max_width=4000)
+    assert full is pipeline.display_image(display_params)
+    assert scale == (1.0, 1.0)
+
+
+@pytest.mark.unit
+def test_roi_selection_maps_to_full_resolution(monkeypatch):
+    """Clicks on a downsampled level are stored in full-resolution pixels."""
+    monkeypatch.setattr(
+        st, "session_state", DummySessionState(image_index_to_id={})
+    )
+    monkeypatch.setattr(
+        usaf_analyzer,
+        "streamlit_image_coordinates",
+        lambda image, **kwargs: {"x1": 10, "y1": 5, "x2": 50, "y2": 25},
+    )
+    monkeypatch.setattr(usaf_analyzer, "get_unique_id_for_image", lambda f: "img_test")
+
+    assert handle_image_selection(0, "frame.tif", None, display_scale=(4.0, 2.0))
+    assert st.session_state["coordinates_img_test"] == ((40, 10), (200, 50))
+    assert st.session_state["roi_valid_img_test"]
+
+
+# Test edge detection
+@pytest.mark.unit
+@pytest.mark.parametrize("dtype", [np.uint8, np.float32, np.float64])
+@pytest.mark.parametrize("window", [1, 5, 13])
+def test_windowed_boundaries_match_sliding_means(dtype, window, monkeypatch):
+    """The prefix-sum detector reproduces the per-position np.mean loop."""
+    rng = np.random.default_rng(window)
+    bars = np.repeat(rng.integers(0, 2, 40), 6) * 180 + rng.integers(0, 40, 240)
+    profile = bars.astype(dtype)
+
+    expected = np.zeros(len(profile))
+    for i in range(window, len(profile) - window):
+        expected[i] = np.mean(profile[i : i + window]) - np.mean(profile[i - window : i])
+    signs = np.sign(expected[window : len(profile) - window])
+    expected_edges = [
+        i + window for i in range(1, len(signs)) if signs[i] != signs[i - 1]
+    ]
+
+    edges = []
+    original_extract = usaf_analyzer.extract_alternating_patterns
+
+    def recording_extract(transitions, types):
+        edges.extend(transitions)
+        return original_extract(transitions, types)
+
+    monkeypatch.setattr(usaf_analyzer, "extract_alternating_patterns", recording_extract)
+    _, derivative, _ = usaf_analyzer.find_line_pair_boundaries_windowed(profile, window)
+
+    np.testing.assert_array_equal(derivative, expected)
+    assert edges == expected_edges
+
+    # Profiles too short for two windows have no derivative
+    _, derivative, _ = usaf_analyzer.find_line_pair_boundaries_windowed(
+        profile[:window], window
+    )
+    assert not derivative.any()
+
+
+@pytest.mark.unit
+def test_transition_helpers():
+    """Threshold crossings, slope sign changes and alternating pairs."""
+    profile = np.array([200, 210, 50, 40, 220, 230, 30, 30, 200], dtype=np.uint8)
+
+    starts, thresholded, types = usaf_analyzer.find_line_pair_boundaries_threshold(
+        profile, 100
+    )
+    assert starts == [2, 6] and types == [-1, -1]
+    assert (thresholded == 100).all()
+
+    transitions, types, _ = usaf_analyzer.detect_significant_transitions(
+        profile.astype(float)
+    )
+    assert transitions == [1, 3, 5, 6, 7]
+    assert types == [-1, 1, -1, 1, 1]
+
+    # Pairs of -1 followed by 1, skipping anything that does not fit
+    assert usaf_analyzer.extract_alternating_patterns(
+        [3, 8, 12, 15, 20, 24, 30], [1, -1, 1, 1, -1, -1, 1]
+    ) == ([8, 12, 24, 30], [-1, 1, -1, 1])
+    assert usaf_analyzer.extract_alternating_patterns(
+        [3, 8, 12], [1, 1, -1]
+    ) == ([3, 8, 12], [1, 1, -1])
+
+
+@pytest.mark.unit
+def test_best_line_pairs_match_pairwise_search():
+    """Sorted-neighbour selection picks the pairs the all-pairs search picks."""
+
+    def pairwise(starts):
+        widths = np.diff(starts).tolist()
+        best, best_diff = (0, 1), float("inf")
+        for i in range(len(widths)):
+            for j in range(i + 1, len(widths)):
+                if abs(widths[i] - widths[j]) < best_diff:
+                    best, best_diff = (i, j), abs(widths[i] - widths[j])
+        return best
+
+    rng = np.random.default_rng(11)
+    boundary_sets = [
+        rng.integers(0, 60, rng.integers(0, 10)).tolist() for _ in range(500)
+    ] + [[0, 10, 20, 31, 41], [5, 5, 5]]
+    pair_indices, avg_widths = usaf_analyzer.find_best_two_line_pairs_batch(
+        boundary_sets
+    )
+
+    for starts, (i, j), avg_width in zip(boundary_sets, pair_indices, avg_widths):
+        pairs, width = usaf_analyzer.find_best_two_line_pairs(starts)
+        if len(starts) < 3:
+            assert pairs == [] and width == 0.0
+            assert i == j == -1 and avg_width == 0.0
+            continue
+        expected_i, expected_j = pairwise(starts)
+        assert (i, j) == (expected_i, expected_j)
+        assert pairs == [
+            (starts[i], starts[i + 1]),
+            (starts[j], starts[j + 1]),
+        ]
+        widths = np.diff(starts)
+        assert width == avg_width == (widths[i] + widths[j]) / 2
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("period", [9.5, 17.3, 26.0])
+def test_fft_period_on_noisy_low_contrast_bars(period):
+    """The frequency-domain period is sub-pixel exact clean and close when noisy."""
+    rng = np.random.default_rng(3)
+    fine = np.full((int(period * 4) + 60) * 10, 130.0)  # 10 samples per pixel
+    for bar in range(3):
+        start = int((12 + bar * period) * 10)
+        fine[start : start + int(period * 5)] = 100
+    clean = fine.reshape(-1, 10).mean(axis=1)
+
+    assert usaf_analyzer.estimate_line_pair_period(clean) == pytest.approx(
+        period, abs=0.3
+    )
+    noisy = clean + rng.normal(0, 6, clean.size)
+    assert usaf_analyzer.estimate_line_pair_period(noisy) == pytest.approx(
+        period, abs=1.0
+    )
+    starts, _, types = usaf_analyzer.find_line_pair_boundaries_fft(noisy)
+    expected = [12 + bar * period for bar in range(3)]
+    assert len(starts) == 3 and types == [-1] * 3
+    np.testing.assert_allclose(starts, expected, atol=2)
+    assert usaf_analyzer.estimate_line_pair_period(np.full(50, 100.0)) == 0.0
+
+
+@pytest.mark.unit
+def test_fft_edge_method_reports_the_period():
+    """edge_method="fft" measures the period; switching methods drops it."""
+    frame = np.full((40, 120), 220, dtype=np.uint8)
+    for start in (20, 44, 68):
+        frame[:, start : start + 12] = 30
+    pipeline, roi = ImagePipeline(frame), (0, 0, 120, 40)
+
+    processor = ImageProcessor()
+    results = processor.process_and_analyze(pipeline, roi, 2, 2, edge_method="fft")
+    assert results["edge_method"] == "fft"
+    assert results["boundaries"] == [20, 44, 68]
+    assert results["avg_line_pair_width"] == pytest.approx(
+        usaf_analyzer.estimate_line_pair_period(processor.profile)
+    )
+    assert results["avg_line_pair_width"] == pytest.approx(24, abs=0.3)
+
+    results = processor.process_and_analyze(pipeline, roi, 2, 2, threshold=100)
+    assert results["avg_line_pair_width"] == 24.0
+
+
+@pytest.mark.unit
+def test_element_contrast_curve_matches_single_analyses(monkeypatch):
+    """One multi-ROI pass gives each element's single-analysis contrast."""
+    frame = np.full((60, 200), 180, dtype=np.uint8)
+    elements = []
+    for k, (bar, dark) in enumerate([(8, 20), (6, 60), (4, 120)]):
+        x = 10 + k * 60
+        for start in range(x + 5, x + 5 + 6 * bar, 2 * bar):
+            frame[10:50, start : start + bar] = dark
+        elements.append(((x, 10, 55, 40), 2, k + 1))
+    elements.append(((180, 10, 55, 40), 3, 1))  # Beyond the frame
+    loads = []
+    load_source = ImageProcessor._load_source
+    monkeypatch.setattr(
+        ImageProcessor,
+        "_load_source",
+        lambda self, source: loads.append(source) or load_source(self, source),
+    )
+    pipeline, processor = ImagePipeline(frame), ImageProcessor()
+
+    curve = processor.analyze_elements(pipeline, elements[::-1], autoscale=False)
+
+    assert curve["element"] == [1, 2, 3]
+    assert curve["lp_per_mm"] == sorted(curve["lp_per_mm"])
+    # Finer bars are printed less dark
+    assert curve["contrast"] == sorted(curve["contrast"], reverse=True)
+    for roi, group, element, contrast in zip(
+        curve["roi"], curve["group"], curve["element"], curve["contrast"]
+    ):
+        single = processor.process_and_analyze(
+            pipeline, roi, group, element, threshold=150, autoscale=False
+        )
+        assert single["contrast"] == pytest.approx(contrast)
+    assert loads == [pipeline]
+
+
+@pytest.mark.unit
+def test_threshold_sweep_picks_a_resolving_threshold():
+    """The sweep scores exactly the thresholds finding two line pairs."""
+    rng = np.random.default_rng(5)
+    profile = np.full(120, 200.0)
+    for start in (20, 50, 80):
+        profile[start : start + 15] = 40
+    profile = np.clip(profile + rng.normal(0, 4, profile.size), 0, 255)
+
+    best, scores = usaf_analyzer.sweep_thresholds(profile)
+
+    assert scores.shape == (256,)
+    for threshold, score in enumerate(scores):
+        starts, _, _ = usaf_analyzer.find_line_pair_boundaries_threshold(
+            profile, threshold
+        )
+        assert (score > 0) == (len(starts) >= 3)
+    starts, _, _ = usaf_analyzer.find_line_pair_boundaries_threshold(profile, best)
+    assert starts == [20, 50, 80]
+    assert 60 < best < 180
+    assert usaf_analyzer.sweep_thresholds(np.full(50, 100.0))[0] is None
+
+
+@pytest.mark.unit
+def test_auto_threshold_analysis():
+    """auto_threshold analyzes at the sweep's best threshold."""
+    frame = np.full((40, 120), 220, dtype=np.uint8)
+    for start in (20, 50, 80):
+        frame[:, start : start + 15] = 30
+    pipeline, roi = ImagePipeline(frame), (0, 0, 120, 40)
+
+    results = ImageProcessor().process_and_analyze(
+        pipeline, roi, 2, 2, threshold=10, auto_threshold=True
+    )
+    processor = ImageProcessor()
+    processor.process_and_analyze(pipeline, roi, 2, 2, threshold=10)
+    best, scores = usaf_analyzer.sweep_thresholds(processor.profile)
+
+    assert best is not None
+    assert results["threshold"] == best
+    assert results["threshold_scores"] == scores.tolist()
+    assert results["boundaries"] == [20, 50, 80]
+
+
+# Run tests if file is executed directly
+if __name__ == "__main__":
+    pytest.main(["-xvs", __file__])